@@ -18,6 +18,7 @@ class Config:
     # Server Configuration
     HOST = os.getenv("HOST", "localhost")
     PORT = int(os.getenv("PORT", DEFAULT_PORT))
+    WORKER_COUNT = int(os.getenv("WEB_CONCURRENCY", "1"))  # Server worker processes
     
     # Database Configuration
     DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///docureview_pro.db")
@@ -29,9 +30,12 @@ class Config:
     AZURE_OPENAI_API_VERSION = os.getenv("AZURE_OPENAI_API_VERSION", "2024-12-01-preview")
     AZURE_OPENAI_DEPLOYMENT = os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-4.1-nano")
     AZURE_OPENAI_MODEL = os.getenv("AZURE_OPENAI_MODEL", "gpt-4.1-nano")
+    LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "16"))  # Max in-flight Azure OpenAI requests
     
     # Embedding Configuration
     SENTENCE_TRANSFORMER_MODEL = os.getenv("SENTENCE_TRANSFORMER_MODEL", "all-MiniLM-L6-v2")
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")  # torch (FP32) | onnx-int8
+    EMBEDDING_QUANTIZATION = os.getenv("EMBEDDING_QUANTIZATION", "avx512_vnni")  # arm64|avx2|avx512|avx512_vnni
     CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "800"))
     CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "100"))
     
@@ -39,15 +43,19 @@ class Config:
     FAISS_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "IndexFlatIP")
     SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.7"))
     TOP_K_RESULTS = int(os.getenv("TOP_K_RESULTS", "5"))
+    FAISS_THREADS = int(os.getenv("FAISS_THREADS", "0"))  # 0 = CPU cores / WORKER_COUNT
     
     # File Upload Configuration
     MAX_FILE_SIZE_MB = int(os.getenv("MAX_FILE_SIZE_MB", "100"))
     ALLOWED_EXTENSIONS = ["txt", "pdf",]
     UPLOAD_FOLDER = os.getenv("UPLOAD_FOLDER", "uploads")
+    UPLOAD_O_DIRECT = os.getenv("UPLOAD_O_DIRECT", "False").lower() == "true"  # Bypass page cache on writes
+    PARALLEL_FS_DELETE = os.getenv("PARALLEL_FS_DELETE", "True").lower() == "true"  # Remove version files concurrently
     
     # Performance Configuration
     MAX_INGESTION_TIME_SECONDS = int(os.getenv("MAX_INGESTION_TIME_SECONDS", "30"))
     MAX_RETRIEVAL_TIME_MS = int(os.getenv("MAX_RETRIEVAL_TIME_MS", "500"))
+    DOC_CONTENT_CACHE_SIZE = int(os.getenv("DOC_CONTENT_CACHE_SIZE", "128"))  # Cached document bodies
     
     # UI Configuration
     THEME_PRIMARY_COLOR = os.getenv("THEME_PRIMARY_COLOR", "#1f77b4")
@@ -72,6 +80,13 @@ class Config:
         
         return True
     
+    @classmethod
+    def get_compute_threads(cls):
+        """Get the per-worker thread count for FAISS/OpenMP kernels"""
+        if cls.FAISS_THREADS > 0:
+            return cls.FAISS_THREADS
+        return max(1, (os.cpu_count() or 1) // max(1, cls.WORKER_COUNT))
+    
     @classmethod
     def get_database_path(cls):
         """Get absolute database path"""
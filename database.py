@@ -3,13 +3,16 @@
 DocuReview Pro - Database Setup and SQLAlchemy Models
 Enterprise Document Version Management & Analysis System
 """
+import logging
 import sqlite3
 from datetime import datetime
 from pathlib import Path
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Float, ForeignKey, Index
+from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Float, ForeignKey, Index, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.types import TypeDecorator
 from config import Config
+from utils.serialization import compress_json, decompress_json, dumps_json, loads_json
 
 # Database setup
 DATABASE_URL = f"sqlite:///{Config.DB_PATH}"
@@ -17,6 +20,69 @@ engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False},
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+logger = logging.getLogger(__name__)
+
+# Column Types
+class JSONText(TypeDecorator):
+    """JSON column: native JSONB on PostgreSQL, serialized text elsewhere"""
+    impl = Text
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import JSONB
+            return dialect.type_descriptor(JSONB())
+        return dialect.type_descriptor(Text())
+
+    def process_bind_param(self, value, dialect):
+        if value is None or dialect.name == "postgresql":
+            return value
+        return dumps_json(value).decode('utf-8')
+
+    def process_result_value(self, value, dialect):
+        if isinstance(value, str):
+            return loads_json(value) if value else None
+        return value
+
+class CompressedJSON(TypeDecorator):
+    """JSON column stored compressed (see utils.serialization)"""
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return compress_json(value) if value is not None else None
+
+    def process_result_value(self, value, dialect):
+        return decompress_json(value)
+
+class TagList(JSONText):
+    """
+    List-of-strings column stored as JSON
+    
+    Rows written before tags were stored as JSON hold a comma-separated
+    string; those are split on read so no data migration is needed.
+    """
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if isinstance(value, str):
+            value = split_tags(value)
+        return super().process_bind_param(value or [], dialect)
+
+    def process_result_value(self, value, dialect):
+        if isinstance(value, str):
+            if not value.startswith('['):
+                return split_tags(value)
+            try:
+                return super().process_result_value(value, dialect) or []
+            except ValueError:  # Legacy comma-separated tags that start with '['
+                return split_tags(value)
+        return super().process_result_value(value, dialect) or []
+
+def split_tags(value: str) -> list:
+    """Split a comma-separated tag string into a list of tags"""
+    return [tag.strip() for tag in value.split(',') if tag.strip()]
+
 # Database Models
 class Document(Base):
     """Document model for version management"""
@@ -31,9 +97,9 @@ class Document(Base):
     author = Column(String(255))
     source = Column(String(500))
     domain = Column(String(255))
-    tags = Column(Text)  # JSON or comma-separated
+    tags = Column(TagList, default=list)  # JSON array (legacy rows: comma-separated)
     notes = Column(Text)
-    checksum = Column(String(64))  # SHA256
+    checksum = Column(String(64))  # BLAKE3 ("b3:"-prefixed) or legacy SHA256
     bytes = Column(Integer)
     status = Column(String(50), default='uploaded')  # uploaded|analyzing|indexed|error
     
@@ -45,6 +111,9 @@ class Document(Base):
     # Unique constraint on slug + version
     __table_args__ = (Index('ux_doc_slug_version', 'slug', 'version', unique=True),)
 
+# Latest-version lookups: partition by slug, newest version first
+Index('ix_doc_slug_latest', Document.slug, Document.version.desc(), Document.updated_at.desc())
+
 class File(Base):
     """File metadata for uploaded documents"""
     __tablename__ = "files"
@@ -80,6 +149,11 @@ class Chunk(Base):
     # Relationships
     document = relationship("Document", back_populates="chunks")
 
+# Per-document chunk lookups and count/analyzed aggregates (covering index)
+Index('ix_chunk_doc_intent', Chunk.document_id, Chunk.intent_label)
+# Intent-filtered search prefilter across documents (covers the id/ix projection)
+Index('ix_chunk_intent', Chunk.intent_label, Chunk.document_id, Chunk.chunk_ix)
+
 class VectorIndex(Base):
     """FAISS vector index metadata"""
     __tablename__ = "vector_indexes"
@@ -104,11 +178,11 @@ class Comparison(Base):
     version_b = Column(Integer, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     
-    # Comparison results (JSON stored as text)
-    text_diff_json = Column(Text)  # Text-level differences
-    section_map_json = Column(Text)  # Section alignment mapping
-    metrics_json = Column(Text)  # Computed similarity metrics
-    llm_summary = Column(Text)  # AI-generated change summary
+    # Comparison results (JSON columns; large payloads compressed)
+    text_diff_json = Column(CompressedJSON)  # Text-level differences
+    section_map_json = Column(CompressedJSON)  # Section alignment mapping
+    metrics_json = Column(JSONText)  # Computed similarity metrics
+    llm_summary = Column(JSONText)  # AI-generated change summary
     
     # Performance metrics
     processing_time_ms = Column(Float)
@@ -138,10 +212,73 @@ class AuditLog(Base):
     operation = Column(String(100), nullable=False)  # upload|analyze|compare|delete
     entity_type = Column(String(50))  # document|chunk|comparison
     entity_id = Column(Integer)
-    details = Column(Text)  # JSON with operation details
+    details = Column(Text)  # JSON-encoded operation details
     user_info = Column(String(255))  # IP, user agent, etc.
     execution_time_ms = Column(Float)
 
+# Full-text indexes (SQLite FTS5, external content tables kept in sync by
+# triggers): word index over chunk text and summaries, trigram index over
+# document titles so substring LIKE searches can use an index
+CHUNK_FTS_TABLE = "chunks_fts"
+TITLE_TRIGRAM_TABLE = "documents_title_trgm"
+
+FTS_INDEXES = {
+    CHUNK_FTS_TABLE: [
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {CHUNK_FTS_TABLE}
+            USING fts5(text, summary, content='chunks', content_rowid='id')""",
+        f"""CREATE TRIGGER IF NOT EXISTS chunks_fts_ai AFTER INSERT ON chunks BEGIN
+            INSERT INTO {CHUNK_FTS_TABLE}(rowid, text, summary) VALUES (new.id, new.text, new.summary);
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS chunks_fts_ad AFTER DELETE ON chunks BEGIN
+            INSERT INTO {CHUNK_FTS_TABLE}({CHUNK_FTS_TABLE}, rowid, text, summary)
+            VALUES ('delete', old.id, old.text, old.summary);
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS chunks_fts_au AFTER UPDATE OF text, summary ON chunks BEGIN
+            INSERT INTO {CHUNK_FTS_TABLE}({CHUNK_FTS_TABLE}, rowid, text, summary)
+            VALUES ('delete', old.id, old.text, old.summary);
+            INSERT INTO {CHUNK_FTS_TABLE}(rowid, text, summary) VALUES (new.id, new.text, new.summary);
+        END""",
+    ],
+    # The trigram tokenizer needs SQLite 3.34+
+    TITLE_TRIGRAM_TABLE: [
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {TITLE_TRIGRAM_TABLE}
+            USING fts5(title, content='documents', content_rowid='id', tokenize='trigram')""",
+        f"""CREATE TRIGGER IF NOT EXISTS documents_title_trgm_ai AFTER INSERT ON documents BEGIN
+            INSERT INTO {TITLE_TRIGRAM_TABLE}(rowid, title) VALUES (new.id, new.title);
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS documents_title_trgm_ad AFTER DELETE ON documents BEGIN
+            INSERT INTO {TITLE_TRIGRAM_TABLE}({TITLE_TRIGRAM_TABLE}, rowid, title)
+            VALUES ('delete', old.id, old.title);
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS documents_title_trgm_au AFTER UPDATE OF title ON documents BEGIN
+            INSERT INTO {TITLE_TRIGRAM_TABLE}({TITLE_TRIGRAM_TABLE}, rowid, title)
+            VALUES ('delete', old.id, old.title);
+            INSERT INTO {TITLE_TRIGRAM_TABLE}(rowid, title) VALUES (new.id, new.title);
+        END""",
+    ],
+}
+
+def init_fts_indexes():
+    """
+    Create the full-text indexes and their sync triggers if missing
+    
+    Existing rows are indexed once, when an index is first created. An
+    index this SQLite build cannot create is skipped with a warning
+    (search then falls back to scanning the table).
+    """
+    for fts_table, statements in FTS_INDEXES.items():
+        try:
+            with engine.begin() as conn:
+                exists = conn.exec_driver_sql(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts_table,)
+                ).first() is not None
+                for statement in statements:
+                    conn.exec_driver_sql(statement)
+                if not exists:
+                    conn.exec_driver_sql(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+        except Exception as e:
+            logger.warning("⚠️  Full-text index %s unavailable: %s", fts_table, e)
+
 # Database functions
 def get_db():
     """Database dependency for FastAPI"""
@@ -156,6 +293,7 @@ def init_database():
     try:
         # Create all tables
         Base.metadata.create_all(bind=engine)
+        init_fts_indexes()
         
         # Insert default diff configuration
         db = SessionLocal()
@@ -4,11 +4,15 @@ DocuReview Pro - Main FastAPI Application
 Enterprise Document Version Management & Analysis System
 """
 import os
+import signal
+import asyncio
+import logging
 import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse
 from pathlib import Path
 
 
@@ -17,13 +21,75 @@ from routers import documents, comparison, search, admin
 from database import init_database
 from config import Config
 
+# Service modules log through the standard logging module
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+
+logger = logging.getLogger(__name__)
+
+# API paths that are served before deferred initialization has finished
+# (interactive docs only; they never touch the database)
+READINESS_EXEMPT_PATHS = ("/api/docs", "/api/redoc")
+
+def _deferred_init(app: FastAPI):
+    """Initialize the database and upload folder, then mark the app ready"""
+    # Initialize database
+    init_database()
+    
+    # Ensure upload folder exists
+    upload_folder = Config.ensure_upload_folder()
+    
+    app.state.ready = True
+    logger.info("✅ Application initialized successfully")
+    logger.info("📊 Database: %s", Config.get_database_path())
+    logger.info("📁 Upload folder: %s", upload_folder)
+
+async def _run_deferred_init(app: FastAPI):
+    """
+    Run deferred initialization off the event loop; on failure, stop the
+    server instead of serving an app that never becomes ready
+    """
+    try:
+        await asyncio.to_thread(_deferred_init, app)
+    except Exception:
+        logger.exception("❌ Application initialization failed, shutting down")
+        # uvicorn handles SIGTERM as a graceful shutdown
+        os.kill(os.getpid(), signal.SIGTERM)
+        raise
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start the application without waiting for database initialization
+    
+    uvicorn binds the port only after lifespan startup completes, so the
+    database work runs in a worker thread once it has; /api routes and
+    /health/ready return 503 until that is done.
+    """
+    logger.info("🚀 Starting %s v%s", Config.APP_NAME, Config.APP_VERSION)
+    
+    # Validate configuration (no I/O, so a bad config still fails startup)
+    Config.validate_config()
+    
+    app.state.ready = False
+    app.state.init_task = asyncio.create_task(_run_deferred_init(app))
+    try:
+        yield
+    finally:
+        # The worker thread cannot be interrupted; let a still-running
+        # initialization finish so the schema is not left half-created
+        await asyncio.gather(app.state.init_task, return_exceptions=True)
+
 # Initialize FastAPI app
 app = FastAPI(
     title=Config.APP_NAME,
     version=Config.APP_VERSION,
     description="Enterprise Document Version Management & Analysis System",
     docs_url="/api/docs" if Config.DEBUG else None,
-    redoc_url="/api/redoc" if Config.DEBUG else None
+    redoc_url="/api/redoc" if Config.DEBUG else None,
+    lifespan=lifespan
 )
 
 # Configure CORS for React frontend
@@ -47,23 +113,30 @@ if frontend_path.exists():
     # Serve static files
     app.mount("/static", StaticFiles(directory=str(frontend_path / "static")), name="static")
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize application on startup"""
-    print(f"ðŸš€ Starting {Config.APP_NAME} v{Config.APP_VERSION}")
-    
-    # Validate configuration
-    Config.validate_config()
-    
-    # Initialize database
-    init_database()
-    
-    # Ensure upload folder exists
-    Config.ensure_upload_folder()
-    
-    print(f"âœ… Application initialized successfully")
-    print(f"ðŸ“Š Database: {Config.get_database_path()}")
-    print(f"ðŸ“ Upload folder: {Config.ensure_upload_folder()}")
+@app.middleware("http")
+async def require_ready(request: Request, call_next):
+    """Answer /api requests with 503 until deferred initialization has finished"""
+    path = request.url.path
+    if (path.startswith("/api/") and not path.startswith(READINESS_EXEMPT_PATHS)
+            and not getattr(app.state, "ready", False)):
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Application is initializing"},
+            headers={"Retry-After": "1"}
+        )
+    return await call_next(request)
+
+@app.get("/health/live")
+async def health_live():
+    """Liveness probe: the server is up and answering requests"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def health_ready():
+    """Readiness probe: 503 until deferred initialization has finished"""
+    if not getattr(app.state, "ready", False):
+        return JSONResponse(status_code=503, content={"status": "initializing"})
+    return {"status": "ready"}
 
 @app.get("/")
 async def root():
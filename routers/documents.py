@@ -271,7 +271,7 @@ async def get_document(
         # Get content if requested
         content = None
         if include_content:
-            content = document_service.get_document_content(document_id)
+            content = await document_service.get_document_content_async(document_id)
         
         # Get analysis if requested
         analysis_summary = None
@@ -280,9 +280,6 @@ async def get_document(
             if "error" not in analysis_data:
                 analysis_summary = analysis_data
         
-        # Convert tags
-        tags = document.tags.split(',') if document.tags else []
-        
         return DocumentDetail(
             id=document.id,
             slug=document.slug,
@@ -292,7 +289,7 @@ async def get_document(
             updated_at=document.updated_at.isoformat(),
             author=document.author,
             domain=document.domain,
-            tags=tags,
+            tags=document.tags or [],
             status=document.status,
             bytes=document.bytes,
             chunk_count=len(document.chunks),
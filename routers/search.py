@@ -50,6 +50,20 @@ class SearchResponse(BaseModel):
     results: List[SearchResult]
     suggestions: Optional[List[str]] = None
 
+class BatchSearchRequest(BaseModel):
+    """Semantic search for several queries at once"""
+    queries: List[str] = Field(..., min_length=1, max_length=20, description="Search queries")
+    document_slug: Optional[str] = Field(None, description="Search within specific document slug")
+    intent_filter: Optional[str] = Field(None, description="Filter by intent label")
+    top_k: int = Field(10, ge=1, le=50, description="Number of results to return per query")
+    similarity_threshold: float = Field(0.5, ge=0.0, le=1.0, description="Minimum similarity score")
+
+class BatchSearchResponse(BaseModel):
+    """Batch search response model (one SearchResponse per query, in order)"""
+    search_type: str
+    processing_time_ms: float
+    searches: List[SearchResponse]
+
 class GlobalSearchRequest(BaseModel):
     """Global search across all documents"""
     query: str = Field(..., min_length=1, max_length=500)
@@ -122,6 +136,58 @@ async def semantic_search(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
+@router.post("/semantic/batch", response_model=BatchSearchResponse)
+async def semantic_search_batch(
+    request: BatchSearchRequest,
+    db: Session = Depends(get_db),
+    embedding_service: EmbeddingService = Depends(get_embedding_service)
+):
+    """
+    Perform semantic search for several queries with one embedding call
+    
+    Args:
+        request (BatchSearchRequest): Queries and shared search parameters
+        
+    Returns:
+        BatchSearchResponse: Results for each query, in request order
+    """
+    try:
+        # Create search service instance
+        search_service = SearchService(db, embedding_service)
+        
+        # Perform batch search
+        result = await search_service.semantic_search_batch(
+            queries=request.queries,
+            document_slug=request.document_slug,
+            intent_filter=request.intent_filter,
+            top_k=request.top_k,
+            similarity_threshold=request.similarity_threshold
+        )
+        
+        # Handle errors
+        if "error" in result:
+            raise HTTPException(status_code=500, detail=result["error"])
+        
+        return BatchSearchResponse(
+            search_type=result["search_type"],
+            processing_time_ms=result["processing_time_ms"],
+            searches=[
+                SearchResponse(
+                    query=search["query"],
+                    search_type=search["search_type"],
+                    total_results=search["total_results"],
+                    processing_time_ms=result["processing_time_ms"],
+                    results=[SearchResult(**res) for res in search["results"]]
+                )
+                for search in result["searches"]
+            ]
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch search failed: {str(e)}")
+
 @router.post("/global", response_model=SearchResponse)
 async def global_search(
     request: GlobalSearchRequest,
@@ -204,7 +270,7 @@ async def get_search_suggestions(
     """
     try:
         from database import Chunk
-        from sqlalchemy import func, or_
+        from sqlalchemy import or_
         
         # Get suggestions from chunk content and summaries
         query_pattern = f"%{query.lower()}%"
@@ -212,9 +278,9 @@ async def get_search_suggestions(
         # Search in summaries and headings
         chunks = db.query(Chunk).filter(
             or_(
-                func.lower(Chunk.summary).like(query_pattern),
-                func.lower(Chunk.heading).like(query_pattern),
-                func.lower(Chunk.text).like(query_pattern)
+                Chunk.summary.like(query_pattern),
+                Chunk.heading.like(query_pattern),
+                Chunk.text.like(query_pattern)
             )
         ).limit(limit * 2).all()  # Get more than needed for filtering
         
@@ -12,7 +12,8 @@ from sqlalchemy.orm import Session
 from database import Document, Chunk, VectorIndex
 from services.llm_service import LLMService
 from services.embedding_service import EmbeddingService
-from utils.text_processing import detect_document_structure
+from services.search_service import clear_suggestion_cache
+from utils.text_processing import detect_document_structure, read_text_file
 
 class AnalysisService:
     """Service for AI-powered document analysis"""
@@ -82,24 +83,13 @@ class AnalysisService:
             embeddings = self.embedding_service.embed_texts(chunk_texts)
             print(f"🧠 Generated embeddings: {embeddings.shape}")
             
-            # Step 3: Analyze each chunk with LLM
-            chunk_analyses = []
-            for i, chunk in enumerate(chunks):
-                try:
-                    analysis = await self.llm_service.analyze_chunk(
-                        text=chunk["text"],
-                        chunk_index=i,
-                        document_title=document.title,
-                        context={"total_chunks": len(chunks)}
-                    )
-                    chunk_analyses.append(analysis)
-                    
-                    if i % 5 == 0:  # Progress update every 5 chunks
-                        print(f"🔄 Analyzed chunk {i+1}/{len(chunks)}")
-                        
-                except Exception as e:
-                    print(f"⚠️  Error analyzing chunk {i}: {e}")
-                    chunk_analyses.append(self._fallback_chunk_analysis(chunk, i))
+            # Step 3: Analyze chunks with LLM (requests run concurrently)
+            chunk_analyses = await self.llm_service.analyze_chunks(
+                chunk_texts,
+                document_title=document.title,
+                context={"total_chunks": len(chunks)}
+            )
+            print(f"🔄 Analyzed {len(chunk_analyses)} chunks")
             
             # Step 4: Save chunks to database
             self._save_chunks_to_db(document_id, chunks, chunk_analyses, embeddings)
@@ -118,6 +108,9 @@ class AnalysisService:
             document.status = "indexed"
             self.db.commit()
             
+            # New intent labels change the search suggestions
+            clear_suggestion_cache()
+            
             # Calculate processing time
             processing_time = (datetime.utcnow() - start_time).total_seconds()
             
@@ -391,9 +384,7 @@ class AnalysisService:
             if not document.files:
                 return None
             
-            file_path = document.files[0].path
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read()
+            return read_text_file(document.files[0].path)
         except Exception as e:
             print(f"❌ Error reading document content: {e}")
             return None
@@ -493,18 +484,6 @@ class AnalysisService:
         
         return outline
 
-    def _fallback_chunk_analysis(self, chunk: Dict, index: int) -> Dict[str, Any]:
-        """Fallback analysis when LLM fails"""
-        return {
-            "intent_label": "other",
-            "summary": f"Text chunk {index} ({len(chunk['text'])} characters)",
-            "heading": None,
-            "subheading": None,
-            "key_values": {},
-            "relationships": [],
-            "fallback": True
-        }
-
 if __name__ == "__main__":
     # Test analysis service
     import asyncio
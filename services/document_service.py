@@ -4,17 +4,43 @@ DocuReview Pro - Document Management Service
 CRUD operations for documents, files, and chunks
 """
 import os
+import mmap
+import asyncio
+import copy
+import logging
 import shutil
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Optional, Any, Tuple
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, func, and_
+from sqlalchemy.orm import Session, aliased, selectinload
+from sqlalchemy import desc, func, and_, case
 
-from database import Document, File, Chunk, VectorIndex, AuditLog
-from utils.text_processing import normalize_text, generate_document_slug, calculate_text_hash, detect_document_structure
+from database import Document, File, Chunk, AuditLog, split_tags
+from utils.text_processing import normalize_text, generate_document_slug, calculate_text_hash, text_matches_checksum, short_checksum, detect_document_structure, read_text_file
+from utils.serialization import dumps_json
 from config import Config
 
+logger = logging.getLogger(__name__)
+
+# Max concurrent file writes in bulk_create_documents
+BULK_WRITE_WORKERS = 8
+
+# Max concurrent version directory removals in delete_document
+DELETE_FS_WORKERS = 8
+
+# Recently read document bodies keyed by (document id, checksum); the
+# checksum in the key means a stale body can never be served
+_content_cache: "OrderedDict[Tuple[int, str], str]" = OrderedDict()
+_content_cache_lock = threading.Lock()
+
+# detect_document_structure results, keyed like the content cache
+STRUCTURE_CACHE_SIZE = 256
+_structure_cache: "OrderedDict[Tuple[int, str], Dict[str, Any]]" = OrderedDict()
+_structure_cache_lock = threading.Lock()
+
 class DocumentService:
     """Service for document management operations"""
     
@@ -29,6 +55,7 @@ class DocumentService:
             service = DocumentService(db_session)
         """
         self.db = db
+        self._pending_audits: List[AuditLog] = []
         self.upload_folder = Path(Config.UPLOAD_FOLDER)
         self.upload_folder.mkdir(parents=True, exist_ok=True)
 
@@ -55,87 +82,163 @@ class DocumentService:
             )
         """
         try:
-            # Normalize and validate content
-            if not content or not content.strip():
-                raise ValueError("Document content cannot be empty")
-            
-            normalized_content = normalize_text(content)
-            content_hash = calculate_text_hash(normalized_content)
-            
-            # Generate slug from title
-            slug = generate_document_slug(title)
-            
-            # Check if document with this slug exists
-            existing_doc = self.db.query(Document).filter(
-                Document.slug == slug
-            ).order_by(desc(Document.version)).first()
-            
-            # Determine version number
-            if existing_doc:
-                # Check if content is identical to latest version
-                if existing_doc.checksum == content_hash:
-                    return existing_doc  # Return existing if identical
-                version = existing_doc.version + 1
-            else:
-                version = 1
-            
-            # Extract metadata
-            meta = metadata or {}
-            author = meta.get("author", "")
-            source = meta.get("source", "")
-            domain = meta.get("domain", "")
-            tags = meta.get("tags", "")
-            notes = meta.get("notes", "")
-            
-            # Create document record
-            document = Document(
-                slug=slug,
-                title=title,
-                version=version,
-                author=author,
-                source=source,
-                domain=domain,
-                tags=tags if isinstance(tags, str) else ",".join(tags) if tags else "",
-                notes=notes,
-                checksum=content_hash,
-                bytes=len(normalized_content.encode('utf-8')),
-                status='uploaded'
-            )
-            
-            self.db.add(document)
-            self.db.flush()  # Get the ID
+            document, content_bytes = self._stage_document(title, content, metadata)
+            if content_bytes is None:
+                return document  # Return existing if identical
             
             # Save file to disk
-            file_path = self._save_document_file(document.id, normalized_content, filename)
-            
-            # Create file record
-            file_record = File(
-                document_id=document.id,
-                filename=filename or f"{slug}_v{version}.txt",
-                path=str(file_path),
-                mime="text/plain",
-                size=len(normalized_content.encode('utf-8'))
-            )
+            file_path = self._save_document_file(document.id, content_bytes, filename)
+            self._add_file_record(document, file_path, content_bytes, filename)
             
-            self.db.add(file_record)
+            self._commit()
             
-            # Log the operation
-            self._log_operation("upload", "document", document.id, {
-                "title": title,
-                "version": version,
-                "size_bytes": document.bytes
-            })
+            logger.info("✅ Document created: %s v%s (ID: %s)", title, document.version, document.id)
+            return document
+            
+        except Exception:
+            self._rollback()
+            logger.exception("❌ Error creating document")
+            raise
+
+    def bulk_create_documents(self, items: List[Dict[str, Any]]) -> List[Document]:
+        """
+        Create many documents (or new versions) in a single transaction
+        
+        Records are staged first, then all files are written concurrently
+        and committed together, so the per-file write/fsync latency overlaps
+        instead of accumulating.
+        
+        Args:
+            items (List[Dict[str, Any]]): Dicts with title, content and
+                optional filename/metadata (same as create_document)
+        
+        Returns:
+            List[Document]: Created (or identical existing) documents, in input order
+        
+        Example:
+            docs = service.bulk_create_documents([
+                {"title": "API Documentation", "content": "..."},
+                {"title": "User Guide", "content": "...", "filename": "guide.txt"}
+            ])
+        """
+        try:
+            documents = []
+            pending_writes = []
+            for item in items:
+                document, content_bytes = self._stage_document(
+                    item["title"], item["content"], item.get("metadata")
+                )
+                documents.append(document)
+                if content_bytes is not None:
+                    pending_writes.append((document, content_bytes, item.get("filename")))
+            
+            if pending_writes:
+                # Overlap file writes and fsyncs across documents
+                with ThreadPoolExecutor(max_workers=min(BULK_WRITE_WORKERS, len(pending_writes))) as pool:
+                    file_paths = list(pool.map(
+                        self._save_document_file,
+                        [document.id for document, _, _ in pending_writes],
+                        [content_bytes for _, content_bytes, _ in pending_writes],
+                        [filename for _, _, filename in pending_writes]
+                    ))
+                
+                for (document, content_bytes, filename), file_path in zip(pending_writes, file_paths):
+                    self._add_file_record(document, file_path, content_bytes, filename)
             
-            self.db.commit()
+            self._commit()
             
-            print(f"✅ Document created: {title} v{version} (ID: {document.id})")
-            return document
+            logger.info("✅ Bulk created %s documents (%s unchanged)", len(pending_writes), len(items) - len(pending_writes))
+            return documents
             
-        except Exception as e:
-            self.db.rollback()
-            print(f"❌ Error creating document: {e}")
+        except Exception:
+            self._rollback()
+            logger.exception("❌ Error bulk creating documents")
             raise
 
+    def _stage_document(self, title: str, content: str,
+                        metadata: Dict[str, Any] = None) -> Tuple[Document, Optional[bytes]]:
+        """
+        Add (and flush) the Document record for new content
+        
+        Returns the latest existing version and None instead when the
+        content is identical to it.
+        """
+        # Normalize and validate content
+        if not content or not content.strip():
+            raise ValueError("Document content cannot be empty")
+        
+        normalized_content = normalize_text(content)
+        content_bytes = normalized_content.encode('utf-8')
+        content_hash = calculate_text_hash(normalized_content)
+        
+        # Generate slug from title
+        slug = generate_document_slug(title)
+        
+        # Check if document with this slug exists (only the columns needed to
+        # pick the next version; the full row is loaded for duplicates only)
+        latest = self.db.query(Document.id, Document.version, Document.checksum).filter(
+            Document.slug == slug
+        ).order_by(desc(Document.version)).limit(1).first()
+        
+        # Determine version number
+        if latest:
+            # Check if content is identical to latest version
+            if text_matches_checksum(normalized_content, latest.checksum, content_hash):
+                return self.db.get(Document, latest.id), None
+            version = latest.version + 1
+        else:
+            version = 1
+        
+        # Extract metadata
+        meta = metadata or {}
+        author = meta.get("author", "")
+        source = meta.get("source", "")
+        domain = meta.get("domain", "")
+        tags = meta.get("tags") or []
+        if isinstance(tags, str):
+            tags = split_tags(tags)
+        notes = meta.get("notes", "")
+        
+        # Create document record
+        document = Document(
+            slug=slug,
+            title=title,
+            version=version,
+            author=author,
+            source=source,
+            domain=domain,
+            tags=tags,
+            notes=notes,
+            checksum=content_hash,
+            bytes=len(content_bytes),
+            status='uploaded'
+        )
+        
+        self.db.add(document)
+        self.db.flush()  # Get the ID
+        
+        return document, content_bytes
+
+    def _add_file_record(self, document: Document, file_path: Path,
+                         content_bytes: bytes, filename: str = None):
+        """Add the File record and upload audit entry for a saved document"""
+        file_record = File(
+            document_id=document.id,
+            filename=filename or f"{document.slug}_v{document.version}.txt",
+            path=str(file_path),
+            mime="text/plain",
+            size=len(content_bytes)
+        )
+        
+        self.db.add(file_record)
+        
+        # Log the operation
+        self._log_operation("upload", "document", document.id, {
+            "title": document.title,
+            "version": document.version,
+            "size_bytes": document.bytes
+        })
+
     def get_document(self, document_id: int) -> Optional[Document]:
         """
         Get document by ID
@@ -206,39 +309,45 @@ class DocumentService:
             total = result["total"]
         """
         try:
-            # Base query - get latest version of each document
-            subquery = self.db.query(
-                Document.slug,
-                func.max(Document.version).label('max_version')
-            ).group_by(Document.slug).subquery()
-            
-            query = self.db.query(Document).join(
-                subquery,
-                and_(
-                    Document.slug == subquery.c.slug,
-                    Document.version == subquery.c.max_version
-                )
-            )
+            # Base query - get latest version of each document (single windowed scan)
+            ranked = self.db.query(
+                Document,
+                func.row_number().over(
+                    partition_by=Document.slug,
+                    order_by=desc(Document.version)
+                ).label('rn')
+            ).subquery()
+            latest = aliased(Document, ranked)
+            
+            query = self.db.query(latest).filter(ranked.c.rn == 1)
             
             # Apply filters
             if search:
                 search_pattern = f"%{search}%"
                 query = query.filter(
-                    Document.title.ilike(search_pattern)
+                    latest.title.ilike(search_pattern)
                 )
             
             if domain:
-                query = query.filter(Document.domain == domain)
+                query = query.filter(latest.domain == domain)
             
-            # Get total count
-            total = query.count()
+            # Apply pagination and ordering; total count comes from the same query
+            rows = query.add_columns(func.count().over().label('total')).order_by(
+                desc(latest.updated_at)
+            ).offset(offset).limit(limit).all()
+            documents = [doc for doc, _ in rows]
             
-            # Apply pagination and ordering
-            documents = query.order_by(desc(Document.updated_at)).offset(offset).limit(limit).all()
+            # Past the last page there are no rows to carry the total
+            if rows:
+                total = rows[0].total
+            else:
+                total = query.count() if offset else 0
+            chunk_counts = self._get_chunk_counts([doc.id for doc in documents])
             
             # Enhance with additional data
             enhanced_docs = []
             for doc in documents:
+                chunk_count, analyzed_count = chunk_counts.get(doc.id, (0, 0))
                 doc_data = {
                     "id": doc.id,
                     "slug": doc.slug,
@@ -248,11 +357,11 @@ class DocumentService:
                     "updated_at": doc.updated_at,
                     "author": doc.author,
                     "domain": doc.domain,
-                    "tags": doc.tags.split(",") if doc.tags else [],
+                    "tags": doc.tags or [],
                     "status": doc.status,
                     "bytes": doc.bytes,
-                    "chunk_count": len(doc.chunks),
-                    "has_analysis": any(chunk.intent_label for chunk in doc.chunks)
+                    "chunk_count": chunk_count,
+                    "has_analysis": analyzed_count > 0
                 }
                 enhanced_docs.append(doc_data)
             
@@ -266,7 +375,7 @@ class DocumentService:
             }
             
         except Exception as e:
-            print(f"❌ Error listing documents: {e}")
+            logger.exception("❌ Error listing documents")
             return {"documents": [], "total": 0, "error": str(e)}
 
     def get_document_versions(self, slug: str) -> List[Dict[str, Any]]:
@@ -286,6 +395,7 @@ class DocumentService:
             documents = self.db.query(Document).filter(
                 Document.slug == slug
             ).order_by(desc(Document.version)).all()
+            chunk_counts = self._get_chunk_counts([doc.id for doc in documents])
             
             versions = []
             for doc in documents:
@@ -298,15 +408,15 @@ class DocumentService:
                     "notes": doc.notes,
                     "status": doc.status,
                     "bytes": doc.bytes,
-                    "chunk_count": len(doc.chunks),
-                    "checksum": doc.checksum[:8] + "..." if doc.checksum else ""
+                    "chunk_count": chunk_counts.get(doc.id, (0, 0))[0],
+                    "checksum": short_checksum(doc.checksum)
                 }
                 versions.append(version_data)
             
             return versions
             
-        except Exception as e:
-            print(f"❌ Error getting document versions: {e}")
+        except Exception:
+            logger.exception("❌ Error getting document versions")
             return []
 
     def get_document_content(self, document_id: int) -> Optional[str]:
@@ -323,21 +433,109 @@ class DocumentService:
             content = service.get_document_content(123)
         """
         try:
-            document = self.get_document(document_id)
-            if not document or not document.files:
+            source = self._get_content_source(document_id)
+            if source is None:
                 return None
             
-            file_path = Path(document.files[0].path)
-            if not file_path.exists():
-                print(f"⚠️  File not found: {file_path}")
+            cache_key, file_path = source
+            content = self._get_cached_content(cache_key)
+            if content is not None:
+                return content
+            
+            if file_path is None:
                 return None
             
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read()
+            content = read_text_file(file_path)
+            self._cache_content(cache_key, content)
+            
+            return content
                 
-        except Exception as e:
-            print(f"❌ Error reading document content: {e}")
+        except Exception:
+            logger.exception("❌ Error reading document content")
+            return None
+
+    async def get_document_content_async(self, document_id: int) -> Optional[str]:
+        """
+        Get document text content without blocking the event loop
+        
+        Same as get_document_content, but the file read runs in a worker
+        thread. Database access stays on the caller's thread.
+        
+        Args:
+            document_id (int): Document ID
+        
+        Returns:
+            Optional[str]: Document content or None
+        
+        Example:
+            content = await service.get_document_content_async(123)
+        """
+        try:
+            source = self._get_content_source(document_id)
+            if source is None:
+                return None
+            
+            cache_key, file_path = source
+            content = self._get_cached_content(cache_key)
+            if content is not None:
+                return content
+            
+            if file_path is None:
+                return None
+            
+            content = await asyncio.to_thread(read_text_file, file_path)
+            self._cache_content(cache_key, content)
+            
+            return content
+                
+        except Exception:
+            logger.exception("❌ Error reading document content")
+            return None
+
+    def _get_content_source(self, document_id: int) -> Optional[Tuple[Tuple[int, str], Optional[Path]]]:
+        """
+        Get a document's content cache key and content file path
+        
+        Reads just the checksum and first file path in one query instead of
+        loading the document row and its files collection.
+        
+        Returns None when the document does not exist; the path is None when
+        it has no (existing) content file.
+        """
+        row = self.db.query(Document.checksum, File.path).outerjoin(
+            File, File.document_id == Document.id
+        ).filter(
+            Document.id == document_id
+        ).order_by(File.id).limit(1).first()
+        
+        if row is None:
             return None
+        
+        cache_key = (document_id, row.checksum)
+        if row.path is None:
+            return cache_key, None
+        
+        file_path = Path(row.path)
+        if not file_path.exists():
+            logger.warning("⚠️  File not found: %s", file_path)
+            return cache_key, None
+        
+        return cache_key, file_path
+
+    def _get_cached_content(self, cache_key: Tuple[int, str]) -> Optional[str]:
+        """Look up a document body in the content cache"""
+        with _content_cache_lock:
+            content = _content_cache.get(cache_key)
+            if content is not None:
+                _content_cache.move_to_end(cache_key)
+            return content
+
+    def _cache_content(self, cache_key: Tuple[int, str], content: str):
+        """Store a document body in the content cache"""
+        with _content_cache_lock:
+            _content_cache[cache_key] = content
+            while len(_content_cache) > Config.DOC_CONTENT_CACHE_SIZE:
+                _content_cache.popitem(last=False)
 
     def update_document_status(self, document_id: int, status: str, details: str = None) -> bool:
         """
@@ -368,12 +566,12 @@ class DocumentService:
                 "details": details
             })
             
-            self.db.commit()
+            self._commit()
             return True
             
-        except Exception as e:
-            print(f"❌ Error updating document status: {e}")
-            self.db.rollback()
+        except Exception:
+            logger.exception("❌ Error updating document status")
+            self._rollback()
             return False
 
     def delete_document(self, document_id: int, delete_all_versions: bool = False) -> bool:
@@ -396,25 +594,40 @@ class DocumentService:
                 return False
             
             if delete_all_versions:
-                # Delete all versions of this document
-                all_versions = self.db.query(Document).filter(
+                # Delete all versions of this document; related rows are loaded
+                # up front (one IN query each) instead of lazily per version
+                all_versions = self.db.query(Document).options(
+                    selectinload(Document.files),
+                    selectinload(Document.vector_indexes),
+                    selectinload(Document.chunks)
+                ).filter(
                     Document.slug == document.slug
                 ).all()
                 
-                for version_doc in all_versions:
-                    self._delete_single_document(version_doc)
+                if Config.PARALLEL_FS_DELETE and len(all_versions) > 1:
+                    # Paths are collected on this thread (the session is not
+                    # thread-safe); only the unlink/rmtree work is fanned out
+                    version_paths = [self._get_document_paths(version_doc) for version_doc in all_versions]
+                    with ThreadPoolExecutor(max_workers=min(DELETE_FS_WORKERS, len(all_versions))) as pool:
+                        list(pool.map(self._delete_single_document_fs, version_paths))
+                    
+                    for version_doc in all_versions:
+                        self._delete_single_document_db(version_doc)
+                else:
+                    for version_doc in all_versions:
+                        self._delete_single_document(version_doc)
             else:
                 # Delete only this version
                 self._delete_single_document(document)
             
-            self.db.commit()
+            self._commit()
             
-            print(f"✅ Document deleted: {document.title} v{document.version}")
+            logger.info("✅ Document deleted: %s v%s", document.title, document.version)
             return True
             
-        except Exception as e:
-            print(f"❌ Error deleting document: {e}")
-            self.db.rollback()
+        except Exception:
+            logger.exception("❌ Error deleting document")
+            self._rollback()
             return False
 
     def get_document_stats(self, document_id: int) -> Dict[str, Any]:
@@ -435,18 +648,22 @@ class DocumentService:
             if not document:
                 return {"error": "Document not found"}
             
-            content = self.get_document_content(document_id)
-            if not content:
+            # Analyze structure (content is only read on a cache miss)
+            structure = self._get_document_structure(document)
+            if structure is None:
                 return {"error": "Content not accessible"}
             
-            # Analyze structure
-            structure = detect_document_structure(content)
-            
-            # Count chunks by intent
+            # Count chunks by intent (aggregated in the database)
             chunk_intents = {}
-            for chunk in document.chunks:
-                intent = chunk.intent_label or "unknown"
-                chunk_intents[intent] = chunk_intents.get(intent, 0) + 1
+            total_chunks = analyzed_chunks = 0
+            for intent_label, count in self.db.query(
+                Chunk.intent_label, func.count(Chunk.id)
+            ).filter(Chunk.document_id == document_id).group_by(Chunk.intent_label).all():
+                intent = intent_label or "unknown"
+                chunk_intents[intent] = chunk_intents.get(intent, 0) + count
+                total_chunks += count
+                if intent_label:
+                    analyzed_chunks += count
             
             stats = {
                 "document_info": {
@@ -459,9 +676,9 @@ class DocumentService:
                 },
                 "content_stats": structure,
                 "chunk_stats": {
-                    "total_chunks": len(document.chunks),
+                    "total_chunks": total_chunks,
                     "chunks_by_intent": chunk_intents,
-                    "analyzed_chunks": sum(1 for c in document.chunks if c.intent_label)
+                    "analyzed_chunks": analyzed_chunks
                 },
                 "indexing_stats": {
                     "has_vector_index": len(document.vector_indexes) > 0,
@@ -472,11 +689,48 @@ class DocumentService:
             return stats
             
         except Exception as e:
-            print(f"❌ Error getting document stats: {e}")
+            logger.exception("❌ Error getting document stats")
             return {"error": str(e)}
 
-    def _save_document_file(self, document_id: int, content: str, filename: str = None) -> Path:
-        """Save document content to file"""
+    def _get_document_structure(self, document: Document) -> Optional[Dict[str, Any]]:
+        """Get detect_document_structure output for a document, cached per version"""
+        cache_key = (document.id, document.checksum)
+        with _structure_cache_lock:
+            structure = _structure_cache.get(cache_key)
+            if structure is not None:
+                _structure_cache.move_to_end(cache_key)
+        
+        # Callers get a deep copy, so mutating the result never alters the cache
+        if structure is not None:
+            return copy.deepcopy(structure)
+        
+        content = self.get_document_content(document.id)
+        if not content:
+            return None
+        
+        structure = detect_document_structure(content)
+        with _structure_cache_lock:
+            _structure_cache[cache_key] = structure
+            while len(_structure_cache) > STRUCTURE_CACHE_SIZE:
+                _structure_cache.popitem(last=False)
+        
+        return copy.deepcopy(structure)
+
+    def _get_chunk_counts(self, document_ids: List[int]) -> Dict[int, Tuple[int, int]]:
+        """Get (chunk_count, analyzed_count) per document in a single aggregate query"""
+        if not document_ids:
+            return {}
+        
+        rows = self.db.query(
+            Chunk.document_id,
+            func.count(Chunk.id),
+            func.sum(case((and_(Chunk.intent_label.isnot(None), Chunk.intent_label != ''), 1), else_=0))
+        ).filter(Chunk.document_id.in_(document_ids)).group_by(Chunk.document_id).all()
+        
+        return {document_id: (count, int(analyzed or 0)) for document_id, count, analyzed in rows}
+
+    def _save_document_file(self, document_id: int, content: bytes, filename: str = None) -> Path:
+        """Save UTF-8 encoded document content to file"""
         # Create document-specific directory
         doc_dir = self.upload_folder / f"doc_{document_id}"
         doc_dir.mkdir(parents=True, exist_ok=True)
@@ -488,34 +742,92 @@ class DocumentService:
         file_path = doc_dir / filename
         
         # Save content
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        if Config.UPLOAD_O_DIRECT and hasattr(os, "O_DIRECT"):
+            try:
+                self._write_file_direct(file_path, content)
+                return file_path
+            except OSError as e:
+                # Not every filesystem supports O_DIRECT (e.g. tmpfs)
+                logger.warning("⚠️  O_DIRECT write failed, using buffered write: %s", e)
+        
+        fd = os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            view = memoryview(content)
+            while view:
+                view = view[os.write(fd, view):]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
         
         return file_path
 
+    def _write_file_direct(self, file_path: Path, content: bytes):
+        """Write content bypassing the page cache (O_DIRECT needs block-aligned I/O)"""
+        block = mmap.PAGESIZE
+        padded_size = max(-(-len(content) // block) * block, block)
+        
+        # Anonymous mmap memory is page-aligned, as O_DIRECT requires
+        buffer = mmap.mmap(-1, padded_size)
+        try:
+            buffer.write(content)
+            fd = os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_DIRECT, 0o644)
+            try:
+                with memoryview(buffer) as view:
+                    offset = 0
+                    while offset < padded_size:
+                        offset += os.write(fd, view[offset:])
+                # Drop the zero padding of the final block
+                os.ftruncate(fd, len(content))
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        finally:
+            buffer.close()
+
     def _delete_single_document(self, document: Document):
         """Delete a single document and its files"""
-        # Delete physical files
+        self._delete_single_document_fs(self._get_document_paths(document))
+        self._delete_single_document_db(document)
+
+    def _get_document_paths(self, document: Document) -> List[Path]:
+        """Collect the files and directory to remove for a document (reads relationships)"""
+        # The whole document directory goes in one go, plus any file record
+        # stored outside it
+        doc_dir = (self.upload_folder / f"doc_{document.id}").resolve()
+        paths = [doc_dir]
         for file_record in document.files:
-            file_path = Path(file_record.path)
-            if file_path.exists():
-                file_path.unlink()
-            
-            # Remove document directory if empty
-            doc_dir = file_path.parent
-            if doc_dir.exists() and not any(doc_dir.iterdir()):
-                doc_dir.rmdir()
+            file_path = Path(file_record.path).resolve()
+            if file_path.parent != doc_dir:
+                paths.append(file_path)
         
-        # Delete FAISS indexes
+        # FAISS indexes (the FAISS directory is shared across documents)
         for vector_index in document.vector_indexes:
             index_path = Path(vector_index.path)
-            if index_path.exists():
-                index_path.unlink()
+            paths.append(index_path)
             
-            # Delete metadata file
-            metadata_path = index_path.with_suffix('.json')
-            if metadata_path.exists():
-                metadata_path.unlink()
+            # Metadata file (doc_<id>_metadata.json.zst, or legacy
+            # doc_<id>_metadata.json) and raw embeddings sidecar (doc_<id>.npy)
+            paths.append(index_path.with_name(f"{index_path.stem}_metadata.json.zst"))
+            paths.append(index_path.with_name(f"{index_path.stem}_metadata.json"))
+            paths.append(index_path.with_suffix(".npy"))
+        
+        return paths
+
+    @staticmethod
+    def _delete_single_document_fs(paths: List[Path]):
+        """Remove a document's physical files (no database access, thread-safe)"""
+        for path in paths:
+            if path.is_dir():
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                path.unlink(missing_ok=True)
+
+    def _delete_single_document_db(self, document: Document):
+        """Delete a single document's database records"""
+        with _content_cache_lock:
+            _content_cache.pop((document.id, document.checksum), None)
+        with _structure_cache_lock:
+            _structure_cache.pop((document.id, document.checksum), None)
         
         # Log deletion
         self._log_operation("delete", "document", document.id, {
@@ -528,23 +840,37 @@ class DocumentService:
 
     def _log_operation(self, operation: str, entity_type: str, entity_id: int, 
                       details: Dict[str, Any], execution_time_ms: float = None):
-        """Log operation to audit trail"""
-        try:
-            audit_log = AuditLog(
-                operation=operation,
-                entity_type=entity_type,
-                entity_id=entity_id,
-                details=str(details) if details else None,
-                execution_time_ms=execution_time_ms
-            )
-            self.db.add(audit_log)
-        except Exception as e:
-            print(f"⚠️  Audit logging failed: {e}")
+        """
+        Queue an audit trail entry (inserted on the next commit)
+        
+        Errors (e.g. unserializable details) propagate, so the caller's
+        transaction is rolled back rather than committed without its audit row.
+        """
+        self._pending_audits.append(AuditLog(
+            operation=operation,
+            entity_type=entity_type,
+            entity_id=entity_id,
+            details=dumps_json(details).decode('utf-8') if details else None,
+            execution_time_ms=execution_time_ms
+        ))
+
+    def _commit(self):
+        """Commit the session, inserting queued audit rows in one batch"""
+        if self._pending_audits:
+            self.db.add_all(self._pending_audits)
+            self._pending_audits.clear()
+        self.db.commit()
+
+    def _rollback(self):
+        """Roll back the session and discard queued audit rows"""
+        self._pending_audits.clear()
+        self.db.rollback()
 
 if __name__ == "__main__":
     # Test document service
     from database import SessionLocal, init_database
     
+    logging.basicConfig(level=logging.INFO)
     print("🧪 Testing Document Service...")
     
     # Initialize database
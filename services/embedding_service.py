@@ -4,7 +4,13 @@ DocuReview Pro - Embedding Service for Semantic Analysis
 Sentence transformers + FAISS for semantic search and similarity
 """
 import os
+import re
 import json
+import queue
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
 import numpy as np
 import faiss
 from typing import List, Dict, Tuple, Optional, Any
@@ -12,8 +18,88 @@ from pathlib import Path
 from sentence_transformers import SentenceTransformer
 from utils.chunking import RollingChunker
 from utils.text_processing import normalize_text
+from utils.serialization import compress_json, decompress_json
 from config import Config
 
+# Query embeddings cached per service, keyed by a BLAKE2b digest of the query
+QUERY_CACHE_SIZE = 4096
+
+# Concurrent query encodes are coalesced into batches of up to this size,
+# waiting at most QUERY_BATCH_WAIT_MS for more queries to arrive
+QUERY_BATCH_SIZE = 32
+QUERY_BATCH_WAIT_MS = 8
+
+# FAISS index selection by document size: exact flat search for small
+# documents, HNSW graphs for medium ones and IVF-PQ for very large ones
+HNSW_MIN_VECTORS = 2000
+IVFPQ_MIN_VECTORS = 50000
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+IVFPQ_SUBQUANTIZERS = 16
+IVFPQ_BITS = 8
+IVF_NPROBE = 16
+
+# Flat and HNSW indexes store vectors as 8-bit scalar codes; searches
+# over-fetch SEARCH_RERANK_FACTOR x top_k candidates and rescore them
+# exactly against the FP16 .npy vectors
+INDEX_SCALAR_QUANTIZER = faiss.ScalarQuantizer.QT_8bit
+SEARCH_RERANK_FACTOR = 4
+
+# Loaded FAISS indexes (with metadata) kept for repeated searches
+SEARCH_INDEX_CACHE_SIZE = 64
+
+# Paragraphs for the chunking fallback: runs of text without a blank line
+FALLBACK_PARAGRAPH_PATTERN = re.compile(r'[^\n]+(?:\n[^\n]+)*')
+
+# Row block size for streamed all-pairs similarity statistics
+COMPARE_BLOCK_ROWS = 1024
+
+class BatchingEmbedder:
+    """
+    Coalesce concurrent single-text encodes into batched encode calls
+    
+    A background thread drains the queue into batches of up to batch_size
+    texts, waiting at most max_wait_ms after the first one, and resolves
+    each caller's Future with its embedding row.
+    
+    Example:
+        batcher = BatchingEmbedder(service.embed_texts)
+        embedding = batcher.submit("user authentication").result()
+    """
+    
+    def __init__(self, encode_fn, batch_size: int = QUERY_BATCH_SIZE,
+                 max_wait_ms: float = QUERY_BATCH_WAIT_MS):
+        self.encode_fn = encode_fn
+        self.batch_size = batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, text: str) -> Future:
+        """Queue a text for encoding; the Future resolves to a (dim,) array"""
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while len(batch) < self.batch_size:
+                    batch.append(self._queue.get(timeout=self.max_wait))
+            except queue.Empty:
+                pass
+            
+            try:
+                embeddings = self.encode_fn([text for text, _ in batch])
+                for (_, future), embedding in zip(batch, embeddings):
+                    future.set_result(embedding)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+
 class EmbeddingService:
     """Service for text embeddings and semantic search using FAISS"""
     
@@ -37,9 +123,15 @@ class EmbeddingService:
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         
+        # Size FAISS's OpenMP pool to this worker's share of the cores so
+        # multi-worker deployments don't oversubscribe the CPU. The
+        # SentenceTransformer (torch) pool follows OMP_NUM_THREADS, which
+        # start.py sets the same way before workers are spawned.
+        faiss.omp_set_num_threads(Config.get_compute_threads())
+        
         # Initialize sentence transformer
         print(f"🔄 Loading embedding model: {model_name}")
-        self.model = SentenceTransformer(model_name)
+        self.model = self._load_model(model_name)
         self.embedding_dim = self.model.get_sentence_embedding_dimension()
         print(f"✅ Embedding model loaded. Dimension: {self.embedding_dim}")
         
@@ -52,6 +144,47 @@ class EmbeddingService:
         # FAISS index directory
         self.faiss_dir = Path(Config.UPLOAD_FOLDER) / "faiss"
         self.faiss_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Query embedding cache and micro-batcher
+        self._query_cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+        self._query_batcher = BatchingEmbedder(self.embed_texts)
+        
+        # Loaded FAISS indexes for search_document
+        self._search_index_cache: "OrderedDict[int, Tuple[int, Any, Dict[str, Any]]]" = OrderedDict()
+        self._search_index_lock = threading.Lock()
+
+    def _load_model(self, model_name: str) -> SentenceTransformer:
+        """
+        Load the sentence transformer on the configured backend
+        
+        With EMBEDDING_BACKEND=onnx-int8 the model is exported to ONNX and
+        dynamically quantized to INT8 once, cached under the upload folder and
+        reloaded from there on later starts. Any failure (missing optimum /
+        onnxruntime, unsupported model) falls back to the FP32 torch model.
+        """
+        if Config.EMBEDDING_BACKEND != "onnx-int8":
+            return SentenceTransformer(model_name)
+        
+        quantization = Config.EMBEDDING_QUANTIZATION
+        model_file = f"onnx/model_qint8_{quantization}.onnx"
+        cache_path = Path(Config.UPLOAD_FOLDER) / "models" / f"{model_name.replace('/', '--')}-onnx-int8"
+        
+        try:
+            if not (cache_path / model_file).exists():
+                from sentence_transformers import export_dynamic_quantized_onnx_model
+                
+                print(f"🔄 Exporting INT8 ONNX embedding model to {cache_path}")
+                onnx_model = SentenceTransformer(model_name, backend="onnx")
+                onnx_model.save(str(cache_path))
+                export_dynamic_quantized_onnx_model(onnx_model, quantization, str(cache_path))
+            
+            return SentenceTransformer(str(cache_path), backend="onnx",
+                                       model_kwargs={"file_name": model_file})
+            
+        except Exception as e:
+            print(f"⚠️  INT8 ONNX backend unavailable, using FP32 model: {e}")
+            return SentenceTransformer(model_name)
 
     def chunk_text(self, text: str) -> List[Dict[str, Any]]:
         """
@@ -78,17 +211,20 @@ class EmbeddingService:
             
         except Exception as e:
             print(f"❌ Error in text chunking: {e}")
-            # Fallback: simple paragraph splitting
-            paragraphs = text.split('\n\n')
-            return [
-                {
-                    "text": para.strip(),
-                    "start": i * 100,  # Approximate
-                    "end": (i + 1) * 100,
-                    "chunk_index": i
-                }
-                for i, para in enumerate(paragraphs) if para.strip()
-            ]
+            # Fallback: simple paragraph splitting (one regex scan, real offsets)
+            chunks = []
+            for match in FALLBACK_PARAGRAPH_PATTERN.finditer(text):
+                para = match.group()
+                stripped = para.strip()
+                if stripped:
+                    start = match.start() + len(para) - len(para.lstrip())
+                    chunks.append({
+                        "text": stripped,
+                        "start": start,
+                        "end": start + len(stripped),
+                        "chunk_index": len(chunks)
+                    })
+            return chunks
 
     def embed_texts(self, texts: List[str]) -> np.ndarray:
         """
@@ -108,17 +244,15 @@ class EmbeddingService:
             if not texts:
                 return np.array([]).reshape(0, self.embedding_dim)
             
-            # Generate embeddings
+            # Generate embeddings, L2-normalized for cosine similarity
             embeddings = self.model.encode(
                 texts,
                 convert_to_numpy=True,
                 show_progress_bar=len(texts) > 10,
-                batch_size=32
+                batch_size=32,
+                normalize_embeddings=True
             )
             
-            # Normalize for cosine similarity
-            faiss.normalize_L2(embeddings)
-            
             return embeddings
             
         except Exception as e:
@@ -126,6 +260,41 @@ class EmbeddingService:
             # Return zero embeddings as fallback
             return np.zeros((len(texts), self.embedding_dim), dtype=np.float32)
 
+    def embed_query(self, query: str) -> np.ndarray:
+        """
+        Generate the embedding for a single search query
+        
+        Repeated queries are served from an LRU cache; new queries are
+        encoded through the micro-batcher, so concurrent searches share one
+        encode call.
+        
+        Args:
+            query (str): Search query
+        
+        Returns:
+            np.ndarray: Query embedding of shape (1, embedding_dim)
+        
+        Example:
+            query_embedding = service.embed_query("user authentication requirements")
+        """
+        cache_key = hashlib.blake2b(query.encode('utf-8'), digest_size=16).digest()
+        with self._query_cache_lock:
+            embedding = self._query_cache.get(cache_key)
+            if embedding is not None:
+                self._query_cache.move_to_end(cache_key)
+                return embedding.reshape(1, -1).copy()
+        
+        embedding = self._query_batcher.submit(query).result()
+        
+        # Zero vectors are embed_texts' failure fallback; don't cache them
+        if np.any(embedding):
+            with self._query_cache_lock:
+                self._query_cache[cache_key] = embedding
+                while len(self._query_cache) > QUERY_CACHE_SIZE:
+                    self._query_cache.popitem(last=False)
+        
+        return embedding.reshape(1, -1).copy()
+
     def build_document_index(self, document_id: int, chunks: List[Dict]) -> str:
         """
         Build FAISS index for a document's chunks
@@ -156,13 +325,23 @@ class EmbeddingService:
             if embeddings.shape[0] == 0:
                 raise ValueError("Failed to generate embeddings")
             
-            # Create FAISS index
-            index = faiss.IndexFlatIP(self.embedding_dim)  # Inner product (cosine similarity)
-            index.add(embeddings)
+            # Create FAISS index (inner product = cosine similarity)
+            index, index_type, search_params = self._make_index(embeddings)
             
-            # Save index to disk
+            # Save index to disk; temp file + rename, as search workers may
+            # have the previous index file memory-mapped
             index_path = self.faiss_dir / f"doc_{document_id}.faiss"
-            faiss.write_index(index, str(index_path))
+            tmp_index_path = index_path.with_suffix(".faiss.tmp")
+            faiss.write_index(index, str(tmp_index_path))
+            os.replace(tmp_index_path, index_path)
+            
+            # Save raw vectors (FP16) alongside for memory-mapped loading; written
+            # to a temp file and swapped in so live memory maps are never truncated
+            embeddings_path = index_path.with_suffix(".npy")
+            tmp_path = embeddings_path.with_suffix(".npy.tmp")
+            with open(tmp_path, 'wb') as f:
+                np.save(f, embeddings.astype(np.float16))
+            os.replace(tmp_path, embeddings_path)
             
             # Save metadata
             metadata = {
@@ -170,19 +349,29 @@ class EmbeddingService:
                 "embedding_dim": self.embedding_dim,
                 "num_vectors": embeddings.shape[0],
                 "model_name": self.model_name,
+                "index_type": index_type,
+                "search_params": search_params,
+                # Entry i describes chunk i (the position is the chunk index)
                 "chunks": [
                     {
-                        "chunk_index": i,
-                        "text_preview": text[:100] + "..." if len(text) > 100 else text,
+                        "text_preview": text if len(text) <= 100 else f"{text[:100]}...",
                         "text_length": len(text)
                     }
-                    for i, text in enumerate(texts)
+                    for text in texts
                 ]
             }
             
-            metadata_path = self.faiss_dir / f"doc_{document_id}_metadata.json"
-            with open(metadata_path, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, indent=2, ensure_ascii=False)
+            # Compressed JSON (see utils.serialization); replaces any legacy
+            # plain-JSON metadata file for this document
+            metadata_path = self.faiss_dir / f"doc_{document_id}_metadata.json.zst"
+            metadata_path.write_bytes(compress_json(metadata))
+            metadata_path.with_suffix("").unlink(missing_ok=True)
+            
+            # Seed the search LRU with the new index so the first query after a
+            # (re)build neither rereads it nor sees a stale entry on filesystems
+            # with coarse mtimes
+            self._apply_search_params(index, search_params)
+            self._cache_search_index(document_id, index_path.stat().st_mtime_ns, index, metadata)
             
             print(f"✅ FAISS index built for document {document_id}: {embeddings.shape[0]} vectors")
             
@@ -192,6 +381,107 @@ class EmbeddingService:
             print(f"❌ Error building FAISS index: {e}")
             raise
 
+    def _make_index(self, embeddings: np.ndarray) -> Tuple[Any, str, Dict[str, int]]:
+        """
+        Build and fill the FAISS index variant suited to the number of vectors
+        
+        Returns:
+            Tuple[Any, str, Dict[str, int]]: Index, index type (flat|hnsw|ivfpq)
+                and the query-time parameters to apply when searching it
+        """
+        n_vectors, dim = embeddings.shape
+        
+        if n_vectors >= IVFPQ_MIN_VECTORS and dim % IVFPQ_SUBQUANTIZERS == 0:
+            nlist = int(np.sqrt(n_vectors))
+            quantizer = faiss.IndexFlatIP(dim)
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, IVFPQ_SUBQUANTIZERS,
+                                     IVFPQ_BITS, faiss.METRIC_INNER_PRODUCT)
+            index.train(embeddings)
+            index.add(embeddings)
+            return index, "ivfpq", {"nprobe": IVF_NPROBE}
+        
+        # Flat and HNSW indexes store vectors as int8 codes (a quarter of the
+        # bytes of FP32; the per-dimension ranges are learned in train)
+        if n_vectors >= HNSW_MIN_VECTORS:
+            index = faiss.IndexHNSWSQ(dim, INDEX_SCALAR_QUANTIZER, HNSW_M,
+                                      faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+            index.train(embeddings)
+            index.add(embeddings)
+            return index, "hnsw", {"efSearch": HNSW_EF_SEARCH}
+        
+        index = faiss.IndexScalarQuantizer(dim, INDEX_SCALAR_QUANTIZER,
+                                           faiss.METRIC_INNER_PRODUCT)
+        index.train(embeddings)
+        index.add(embeddings)
+        return index, "flat", {}
+
+    def _load_search_index(self, document_id: int) -> Optional[Tuple[Any, Dict[str, Any]]]:
+        """
+        Get a document's FAISS index (search parameters applied) and metadata
+        
+        Recently searched indexes are kept in an LRU; entries are keyed by
+        the index file's mtime, so a rebuilt index is reloaded automatically.
+        Returns None when the document has no index.
+        """
+        index_path = self.faiss_dir / f"doc_{document_id}.faiss"
+        try:
+            mtime_ns = index_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            with self._search_index_lock:
+                self._search_index_cache.pop(document_id, None)
+            return None
+        
+        with self._search_index_lock:
+            cached = self._search_index_cache.get(document_id)
+            if cached is not None and cached[0] == mtime_ns:
+                self._search_index_cache.move_to_end(document_id)
+                return cached[1], cached[2]
+        
+        index = self._read_index_mmap(index_path)
+        metadata = self._load_index_metadata(document_id)
+        self._apply_search_params(index, metadata.get("search_params", {}))
+        
+        self._cache_search_index(document_id, mtime_ns, index, metadata)
+        return index, metadata
+
+    @staticmethod
+    def _read_index_mmap(index_path: Path) -> Any:
+        """
+        Read a FAISS index memory-mapped and read-only, so server workers
+        share the index pages through the OS page cache; index types this
+        FAISS build cannot map are read into memory as before
+        """
+        try:
+            return faiss.read_index(str(index_path), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError:
+            return faiss.read_index(str(index_path))
+
+    def _cache_search_index(self, document_id: int, mtime_ns: int, index: Any, metadata: Dict[str, Any]):
+        """Store a loaded or freshly built index in the search LRU"""
+        with self._search_index_lock:
+            self._search_index_cache[document_id] = (mtime_ns, index, metadata)
+            self._search_index_cache.move_to_end(document_id)
+            while len(self._search_index_cache) > SEARCH_INDEX_CACHE_SIZE:
+                self._search_index_cache.popitem(last=False)
+
+    def _load_index_metadata(self, document_id: int) -> Dict[str, Any]:
+        """Load a document's index metadata (compressed, or legacy plain JSON)"""
+        metadata_path = self.faiss_dir / f"doc_{document_id}_metadata.json.zst"
+        if metadata_path.exists():
+            return decompress_json(metadata_path.read_bytes(), {})
+        
+        with open(metadata_path.with_suffix(""), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    @staticmethod
+    def _apply_search_params(index: Any, search_params: Dict[str, int]):
+        """Apply the query-time parameters recorded in an index's metadata"""
+        if "efSearch" in search_params:
+            index.hnsw.efSearch = search_params["efSearch"]
+        if "nprobe" in search_params:
+            index.nprobe = search_params["nprobe"]
+
     def search_document(self, document_id: int, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
         """
         Search document using semantic similarity
@@ -212,24 +502,19 @@ class EmbeddingService:
             )
         """
         try:
-            index_path = self.faiss_dir / f"doc_{document_id}.faiss"
-            metadata_path = self.faiss_dir / f"doc_{document_id}_metadata.json"
-            
-            if not index_path.exists():
+            # Load index and metadata (cached for hot documents)
+            loaded = self._load_search_index(document_id)
+            if loaded is None:
                 return []
-            
-            # Load index
-            index = faiss.read_index(str(index_path))
-            
-            # Load metadata
-            with open(metadata_path, 'r', encoding='utf-8') as f:
-                metadata = json.load(f)
+            index, metadata = loaded
             
             # Generate query embedding
-            query_embedding = self.embed_texts([query])
+            query_embedding = self.embed_query(query)
             
-            # Search
-            scores, indices = index.search(query_embedding, min(top_k, index.ntotal))
+            # Search, over-fetching candidates for the exact rescoring below
+            n_candidates = min(top_k * SEARCH_RERANK_FACTOR, index.ntotal)
+            scores, indices = index.search(query_embedding, n_candidates)
+            scores, indices = self._rerank_exact(document_id, query_embedding, scores, indices, top_k)
             
             # Format results
             results = []
@@ -250,6 +535,22 @@ class EmbeddingService:
             print(f"❌ Error searching document: {e}")
             return []
 
+    def _rerank_exact(self, document_id: int, query_embedding: np.ndarray, scores: np.ndarray,
+                      indices: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rescore quantized-index candidates with the stored FP16 vectors and
+        keep the best top_k; without a .npy sidecar the index scores are kept
+        """
+        candidates = indices[0][indices[0] >= 0]
+        embeddings_path = self.faiss_dir / f"doc_{document_id}.npy"
+        if candidates.size == 0 or not embeddings_path.exists():
+            return scores[:, :top_k], indices[:, :top_k]
+        
+        vectors = np.load(embeddings_path, mmap_mode='r')
+        exact = vectors[candidates].astype(np.float32) @ query_embedding.ravel()
+        order = np.argsort(-exact, kind="stable")[:top_k]
+        return exact[order][None, :], candidates[order][None, :]
+
     def compare_embeddings(self, embeddings_a: np.ndarray, embeddings_b: np.ndarray) -> Dict[str, float]:
         """
         Compare two sets of embeddings for similarity analysis
@@ -269,20 +570,33 @@ class EmbeddingService:
             if embeddings_a.shape[0] == 0 or embeddings_b.shape[0] == 0:
                 return {"avg_similarity": 0.0, "max_similarity": 0.0, "min_similarity": 0.0}
             
-            # Compute pairwise similarities
-            similarities = np.dot(embeddings_a, embeddings_b.T)
-            
-            # Calculate metrics
-            max_similarities_a = np.max(similarities, axis=1)  # Best match for each in A
-            max_similarities_b = np.max(similarities, axis=0)  # Best match for each in B
+            embeddings_a = np.ascontiguousarray(embeddings_a, dtype=np.float32)
+            embeddings_b = np.ascontiguousarray(embeddings_b, dtype=np.float32)
+            
+            # All statistics in one pass over row blocks of A, so at most
+            # COMPARE_BLOCK_ROWS x n_b similarities are held at once
+            n_a, n_b = embeddings_a.shape[0], embeddings_b.shape[0]
+            max_similarities_a = np.empty(n_a, dtype=np.float32)  # Best match for each in A
+            max_similarities_b = np.full(n_b, -np.inf, dtype=np.float32)  # Best match for each in B
+            total = 0.0
+            min_similarity = np.inf
+            for start in range(0, n_a, COMPARE_BLOCK_ROWS):
+                block = embeddings_a[start:start + COMPARE_BLOCK_ROWS] @ embeddings_b.T
+                total += float(block.sum(dtype=np.float64))
+                min_similarity = min(min_similarity, float(block.min()))
+                block.max(axis=1, out=max_similarities_a[start:start + COMPARE_BLOCK_ROWS])
+                np.maximum(max_similarities_b, block.max(axis=0), out=max_similarities_b)
+            
+            avg_best_match_a = float(max_similarities_a.mean())
+            avg_best_match_b = float(max_similarities_b.mean())
             
             metrics = {
-                "avg_similarity": float(np.mean(similarities)),
-                "max_similarity": float(np.max(similarities)),
-                "min_similarity": float(np.min(similarities)),
-                "avg_best_match_a": float(np.mean(max_similarities_a)),
-                "avg_best_match_b": float(np.mean(max_similarities_b)),
-                "overall_similarity": float((np.mean(max_similarities_a) + np.mean(max_similarities_b)) / 2)
+                "avg_similarity": total / (n_a * n_b),
+                "max_similarity": float(max_similarities_a.max()),
+                "min_similarity": min_similarity,
+                "avg_best_match_a": avg_best_match_a,
+                "avg_best_match_b": avg_best_match_b,
+                "overall_similarity": (avg_best_match_a + avg_best_match_b) / 2
             }
             
             return metrics
@@ -295,6 +609,10 @@ class EmbeddingService:
         """
         Load embeddings for a document from disk
         
+        Prefers the .npy sidecar written at index time, returned as a
+        read-only memory map (FP16; older sidecars are FP32); indexes built
+        before sidecars existed are read back from the FAISS index itself.
+        
         Args:
             document_id (int): Document ID
         
@@ -310,10 +628,17 @@ class EmbeddingService:
             if not index_path.exists():
                 return None
             
+            embeddings_path = index_path.with_suffix(".npy")
+            if embeddings_path.exists():
+                return np.load(embeddings_path, mmap_mode='r')
+            
             # Load index and extract embeddings
             index = faiss.read_index(str(index_path))
             
-            # Extract all vectors from index
+            # Extract all vectors from index (IVF indexes need a direct map;
+            # IVF-PQ vectors come back approximated)
+            if isinstance(index, faiss.IndexIVF):
+                index.make_direct_map()
             embeddings = np.zeros((index.ntotal, self.embedding_dim), dtype=np.float32)
             index.reconstruct_n(0, index.ntotal, embeddings)
             
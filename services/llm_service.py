@@ -3,11 +3,77 @@
 DocuReview Pro - LLM Service for Azure OpenAI Integration
 Enterprise AI-powered document analysis using Azure OpenAI
 """
+import os
 import json
+import time
 import asyncio
+import hashlib
+import threading
+from pathlib import Path
+from string import Template
 from typing import Dict, List, Optional, Any
-from openai import AzureOpenAI
+from openai import AsyncAzureOpenAI, RateLimitError
 from datetime import datetime
+from config import Config
+from utils.serialization import dumps_json, loads_json
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken is optional; fall back to character truncation
+    tiktoken = None
+
+# JSON mode: the model is constrained to emit a single valid JSON object
+JSON_RESPONSE_FORMAT = {"type": "json_object"}
+
+# Rate-limited requests are retried with exponential backoff
+# (LLM_RETRY_BASE_DELAY, doubled on each attempt)
+LLM_MAX_RETRIES = 4
+LLM_RETRY_BASE_DELAY = 1.0
+
+# Part of the analysis cache key; bump when prompts change so cached
+# analyses from older prompts are not reused
+PROMPT_VERSION = "v2"
+
+# On-disk analysis cache bounds: entries expire after LLM_CACHE_TTL_SECONDS
+# and the oldest are evicted beyond LLM_CACHE_MAX_ENTRIES; the directory is
+# pruned every LLM_CACHE_PRUNE_INTERVAL writes
+LLM_CACHE_TTL_SECONDS = 30 * 24 * 60 * 60
+LLM_CACHE_MAX_ENTRIES = 10000
+LLM_CACHE_PRUNE_INTERVAL = 100
+
+# Prompt input limits, in tokens (characters are used when tiktoken is
+# unavailable, at ~4 characters per token)
+CHUNK_PROMPT_TOKENS = 1200
+CHANGE_DATA_PROMPT_TOKENS = 400
+SYNTHESIS_SUMMARIES_TOKENS = 8000
+
+# Character budget for serializing change data; generous enough that the
+# token truncation, not the serializer, decides the final cut
+CHANGE_DATA_CHAR_BUDGET = CHANGE_DATA_PROMPT_TOKENS * 8
+
+
+def _bounded_json(obj: Any, budget: int = 1500) -> str:
+    """
+    Serialize obj as indented JSON, stopping once budget characters are emitted
+    
+    Args:
+        obj: JSON-serializable object
+        budget: Maximum number of characters to emit before truncating
+        
+    Returns:
+        JSON text, suffixed with "...[truncated]" if it was cut short
+    """
+    parts = []
+    total = 0
+    for chunk in json.JSONEncoder(indent=2).iterencode(obj):
+        if total + len(chunk) > budget:
+            parts.append(chunk[:budget - total])
+            parts.append("...[truncated]")
+            break
+        parts.append(chunk)
+        total += len(chunk)
+    return "".join(parts)
+
 
 class LLMService:
     """Azure OpenAI service for document analysis and comparison"""
@@ -33,21 +99,33 @@ class LLMService:
         self.endpoint = endpoint
         self.deployment = deployment
         
-        # Initialize Azure OpenAI client
-        self.client = AzureOpenAI(
+        # Initialize Azure OpenAI client (async, so requests can overlap)
+        self.client = AsyncAzureOpenAI(
             api_version=api_version,
             azure_endpoint=endpoint,
             api_key=api_key,
         )
         
-        # Analysis prompts
+        # Bounds the number of in-flight requests
+        self._semaphore = asyncio.Semaphore(Config.LLM_CONCURRENCY)
+        
+        # Tokenizer for prompt truncation
+        self._encoding = self._get_encoding()
+        
+        # Persistent cache of parsed analyses, keyed by content hash
+        self._cache_dir = Path(Config.UPLOAD_FOLDER) / "llm_cache"
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+        self._cache_prune_lock = threading.Lock()
+        self._writes_until_prune = 1  # Prune once on the first write
+        
+        # Analysis prompts, compiled once as string.Template ($name placeholders)
         self.prompts = {
             "chunk_analysis": """You are an expert document analyst. Analyze this text chunk and provide structured analysis.
 
 Text to analyze:
-{text}
+$text
 
-Context: This is chunk {chunk_index} from document "{document_title}".
+Context: This is chunk $chunk_index from document "$document_title".
 
 Provide your analysis in this exact JSON format:
 {
@@ -69,11 +147,11 @@ Focus on accuracy and consistency. Be concise but thorough.""",
 
             "document_synthesis": """You are an expert document analyst. Synthesize the overall structure and content of this document.
 
-Document: {document_title}
-Total chunks: {chunk_count}
+Document: $document_title
+Total chunks: $chunk_count
 
 Chunk summaries:
-{chunk_summaries}
+$chunk_summaries
 
 Provide your synthesis in this exact JSON format:
 {
@@ -92,16 +170,16 @@ Focus on document structure and main themes.""",
 
             "comparison_summary": """You are an expert document analyst. Analyze the differences between two document versions.
 
-Document: {document_title}
-Version A: {version_a} vs Version B: {version_b}
+Document: $document_title
+Version A: $version_a vs Version B: $version_b
 
 Changes detected:
-{change_data}
+$change_data
 
 Metrics:
-- Text similarity: {text_similarity}%
-- Structural changes: {structural_changes}
-- Intent changes: {intent_changes}
+- Text similarity: $text_similarity%
+- Structural changes: $structural_changes
+- Intent changes: $intent_changes
 
 Provide your analysis in this exact JSON format:
 {
@@ -117,6 +195,7 @@ Provide your analysis in this exact JSON format:
 
 Focus on business impact and actionable insights."""
         }
+        self._templates = {name: Template(prompt) for name, prompt in self.prompts.items()}
 
     async def analyze_chunk(self, text: str, chunk_index: int, document_title: str, context: Dict = None) -> Dict[str, Any]:
         """
@@ -138,39 +217,39 @@ Focus on business impact and actionable insights."""
                 "System Requirements Document"
             )
         """
+        cache_key = self._cache_key("chunk", text)
+        cached = await asyncio.to_thread(self._read_cache, cache_key)
+        if cached is not None:
+            cached["chunk_index"] = chunk_index
+            return cached
+        
         try:
-            prompt = self.prompts["chunk_analysis"].format(
-                text=text[:2000],  # Limit text for token efficiency
+            prompt = self._templates["chunk_analysis"].substitute(
+                text=self._truncate(text, CHUNK_PROMPT_TOKENS),  # Limit text for token efficiency
                 chunk_index=chunk_index,
                 document_title=document_title
             )
             
-            response = self.client.chat.completions.create(
+            response = await self._create_completion(
                 messages=[
                     {"role": "system", "content": "You are a precise document analyst. Always respond with valid JSON."},
                     {"role": "user", "content": prompt}
                 ],
                 max_tokens=500,
                 temperature=0.3,  # Lower temperature for consistency
-                model=self.deployment
+                model=self.deployment,
+                response_format=JSON_RESPONSE_FORMAT
             )
             
             # Parse JSON response
-            content = response.choices[0].message.content.strip()
-            
-            # Clean JSON if wrapped in code blocks
-            if content.startswith("```json"):
-                content = content[7:-3]
-            elif content.startswith("```"):
-                content = content[3:-3]
-            
-            analysis = json.loads(content)
+            analysis = json.loads(response.choices[0].message.content)
             
             # Add metadata
             analysis["processing_timestamp"] = datetime.utcnow().isoformat()
             analysis["chunk_index"] = chunk_index
             analysis["token_usage"] = response.usage.total_tokens if response.usage else 0
             
+            await asyncio.to_thread(self._write_cache, cache_key, analysis)
             return analysis
             
         except json.JSONDecodeError as e:
@@ -180,6 +259,39 @@ Focus on business impact and actionable insights."""
             print(f"❌ Error in chunk analysis: {e}")
             return self._fallback_chunk_analysis(text, chunk_index)
 
+    async def analyze_chunks(self, texts: List[str], document_title: str,
+                             context: Dict = None) -> List[Dict[str, Any]]:
+        """
+        Analyze many text chunks concurrently
+        
+        Requests run in parallel up to Config.LLM_CONCURRENCY at a time;
+        results are returned in input order, with the fallback analysis for
+        any chunk that fails.
+        
+        Args:
+            texts (List[str]): Text chunks to analyze
+            document_title (str): Document title for context
+            context (Dict, optional): Additional context
+        
+        Returns:
+            List[Dict[str, Any]]: Analysis results, one per chunk
+        
+        Example:
+            results = await service.analyze_chunks(
+                ["Chunk one...", "Chunk two..."],
+                "System Requirements Document"
+            )
+        """
+        results = await asyncio.gather(*[
+            self.analyze_chunk(text, i, document_title, context)
+            for i, text in enumerate(texts)
+        ], return_exceptions=True)
+        
+        return [
+            self._fallback_chunk_analysis(text, i) if isinstance(result, Exception) else result
+            for i, (text, result) in enumerate(zip(texts, results))
+        ]
+
     async def synthesize_document(self, document_title: str, chunk_analyses: List[Dict]) -> Dict[str, Any]:
         """
         Synthesize document-level analysis from chunk analyses
@@ -197,40 +309,46 @@ Focus on business impact and actionable insights."""
                 [chunk1_analysis, chunk2_analysis, ...]
             )
         """
+        # Prepare chunk summaries, within the prompt token budget
+        summary_lines = []
+        total_tokens = 0
+        for i, analysis in enumerate(chunk_analyses):
+            line = f"Chunk {i}: {analysis.get('summary', 'No summary')}"
+            total_tokens += self._count_tokens(line) + 1  # + newline
+            if total_tokens > SYNTHESIS_SUMMARIES_TOKENS:
+                summary_lines.append(f"... ({len(chunk_analyses) - i} more chunks omitted)")
+                break
+            summary_lines.append(line)
+        chunk_summaries = "\n".join(summary_lines)
+        
+        cache_key = self._cache_key("synthesis", document_title, chunk_summaries)
+        cached = await asyncio.to_thread(self._read_cache, cache_key)
+        if cached is not None:
+            return cached
+        
         try:
-            # Prepare chunk summaries
-            chunk_summaries = []
-            for i, analysis in enumerate(chunk_analyses):
-                chunk_summaries.append(f"Chunk {i}: {analysis.get('summary', 'No summary')}")
-            
-            prompt = self.prompts["document_synthesis"].format(
+            prompt = self._templates["document_synthesis"].substitute(
                 document_title=document_title,
                 chunk_count=len(chunk_analyses),
-                chunk_summaries="\n".join(chunk_summaries)
+                chunk_summaries=chunk_summaries
             )
             
-            response = self.client.chat.completions.create(
+            response = await self._create_completion(
                 messages=[
                     {"role": "system", "content": "You are an expert document synthesizer. Always respond with valid JSON."},
                     {"role": "user", "content": prompt}
                 ],
                 max_tokens=800,
                 temperature=0.3,
-                model=self.deployment
+                model=self.deployment,
+                response_format=JSON_RESPONSE_FORMAT
             )
             
-            content = response.choices[0].message.content.strip()
-            
-            # Clean JSON
-            if content.startswith("```json"):
-                content = content[7:-3]
-            elif content.startswith("```"):
-                content = content[3:-3]
-            
-            synthesis = json.loads(content)
+            synthesis = json.loads(response.choices[0].message.content)
             synthesis["processing_timestamp"] = datetime.utcnow().isoformat()
             synthesis["token_usage"] = response.usage.total_tokens if response.usage else 0
             
+            await asyncio.to_thread(self._write_cache, cache_key, synthesis)
             return synthesis
             
         except Exception as e:
@@ -261,35 +379,28 @@ Focus on business impact and actionable insights."""
             )
         """
         try:
-            prompt = self.prompts["comparison_summary"].format(
+            prompt = self._templates["comparison_summary"].substitute(
                 document_title=document_title,
                 version_a=version_a,
                 version_b=version_b,
-                change_data=json.dumps(change_data, indent=2)[:1500],
+                change_data=self._truncate(_bounded_json(change_data, CHANGE_DATA_CHAR_BUDGET), CHANGE_DATA_PROMPT_TOKENS),
                 text_similarity=round(metrics.get("similarity", 0) * 100, 1),
                 structural_changes=metrics.get("structural_changes", 0),
                 intent_changes=metrics.get("intent_changes", 0)
             )
             
-            response = self.client.chat.completions.create(
+            response = await self._create_completion(
                 messages=[
                     {"role": "system", "content": "You are an expert change analyst. Always respond with valid JSON."},
                     {"role": "user", "content": prompt}
                 ],
                 max_tokens=600,
                 temperature=0.4,
-                model=self.deployment
+                model=self.deployment,
+                response_format=JSON_RESPONSE_FORMAT
             )
             
-            content = response.choices[0].message.content.strip()
-            
-            # Clean JSON
-            if content.startswith("```json"):
-                content = content[7:-3]
-            elif content.startswith("```"):
-                content = content[3:-3]
-            
-            summary = json.loads(content)
+            summary = json.loads(response.choices[0].message.content)
             summary["processing_timestamp"] = datetime.utcnow().isoformat()
             summary["token_usage"] = response.usage.total_tokens if response.usage else 0
             
@@ -299,6 +410,115 @@ Focus on business impact and actionable insights."""
             print(f"❌ Error in comparison summary: {e}")
             return self._fallback_comparison_summary()
 
+    def _get_encoding(self):
+        """Get the tiktoken encoding for the configured model (None without tiktoken)"""
+        if tiktoken is None:
+            return None
+        try:
+            try:
+                return tiktoken.encoding_for_model(Config.AZURE_OPENAI_MODEL)
+            except KeyError:
+                return tiktoken.get_encoding("cl100k_base")
+        except Exception as e:  # e.g. encoding files cannot be downloaded
+            print(f"⚠️  Tokenizer unavailable, truncating prompts by characters: {e}")
+            return None
+
+    def _count_tokens(self, text: str) -> int:
+        """Count the tokens in text (estimated from characters without tiktoken)"""
+        if self._encoding is None:
+            return len(text) // 4 + 1
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+    def _truncate(self, text: str, max_tokens: int) -> str:
+        """Truncate text to at most max_tokens tokens"""
+        if self._encoding is None:
+            return text[:max_tokens * 4]
+        
+        tokens = self._encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        return self._encoding.decode(tokens[:max_tokens])
+
+    def _cache_key(self, kind: str, *parts: str) -> str:
+        """Hash the deployment, prompt version and inputs into a cache key"""
+        hasher = hashlib.blake2b(digest_size=20)
+        for part in (self.deployment, PROMPT_VERSION, kind, *parts):
+            hasher.update(part.encode('utf-8'))
+            hasher.update(b"\x00")
+        return hasher.hexdigest()
+
+    def _read_cache(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Load a cached analysis, stamped with cache_hit=True (blocking file I/O)"""
+        cache_path = self._cache_dir / f"{cache_key}.json"
+        try:
+            with open(cache_path, "rb") as f:
+                expired = time.time() - os.fstat(f.fileno()).st_mtime > LLM_CACHE_TTL_SECONDS
+                result = None if expired else loads_json(f.read())
+            if expired:
+                cache_path.unlink(missing_ok=True)
+                return None
+            result["cache_hit"] = True
+            return result
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️  Ignoring unreadable LLM cache entry {cache_key}: {e}")
+            return None
+
+    def _write_cache(self, cache_key: str, result: Dict[str, Any]):
+        """Store an analysis atomically (temp file + rename; blocking file I/O)"""
+        try:
+            cache_path = self._cache_dir / f"{cache_key}.json"
+            tmp_path = cache_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(dumps_json(result))
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            print(f"⚠️  LLM cache write failed: {e}")
+        
+        with self._cache_prune_lock:
+            self._writes_until_prune -= 1
+            prune = self._writes_until_prune <= 0
+            if prune:
+                self._writes_until_prune = LLM_CACHE_PRUNE_INTERVAL
+        if prune:
+            self._prune_cache()
+
+    def _prune_cache(self):
+        """Delete expired cache entries, then the oldest beyond LLM_CACHE_MAX_ENTRIES"""
+        try:
+            cutoff = time.time() - LLM_CACHE_TTL_SECONDS
+            entries = []
+            with os.scandir(self._cache_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith(".json"):
+                        continue
+                    try:
+                        mtime = entry.stat().st_mtime
+                    except FileNotFoundError:
+                        continue
+                    if mtime < cutoff:
+                        Path(entry.path).unlink(missing_ok=True)
+                    else:
+                        entries.append((mtime, entry.path))
+            
+            if len(entries) > LLM_CACHE_MAX_ENTRIES:
+                entries.sort()
+                for _, path in entries[:len(entries) - LLM_CACHE_MAX_ENTRIES]:
+                    Path(path).unlink(missing_ok=True)
+        except Exception as e:
+            print(f"⚠️  LLM cache pruning failed: {e}")
+
+    async def _create_completion(self, **kwargs):
+        """Create a chat completion, bounded by the semaphore and retried on rate limits"""
+        async with self._semaphore:
+            for attempt in range(LLM_MAX_RETRIES + 1):
+                try:
+                    return await self.client.chat.completions.create(**kwargs)
+                except RateLimitError:
+                    if attempt == LLM_MAX_RETRIES:
+                        raise
+                    await asyncio.sleep(LLM_RETRY_BASE_DELAY * 2 ** attempt)
+
     def _fallback_chunk_analysis(self, text: str, chunk_index: int) -> Dict[str, Any]:
         """Fallback analysis when AI fails"""
         return {
@@ -344,9 +564,6 @@ Focus on business impact and actionable insights."""
 
 if __name__ == "__main__":
     # Test LLM service
-    import os
-    from config import Config
-    
     async def test_llm_service():
         print("🧪 Testing LLM Service...")
         
@@ -4,15 +4,79 @@ DocuReview Pro - Search Service (FIXED)
 Enhanced search functionality with proper result handling and debugging
 """
 import asyncio
+import re
 import time
 import json
-from typing import List, Dict, Any, Optional
+import hashlib
+import heapq
+import threading
+import numpy as np
+from bisect import bisect_left
+from collections import Counter, OrderedDict, defaultdict
+from functools import lru_cache
+from typing import Callable, List, Dict, Any, Optional, Pattern, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_, text
+from sqlalchemy import func, and_, or_, text, select, literal_column, table, column
 
-from database import Document, Chunk, VectorIndex
+from config import Config
+from database import Document, Chunk, VectorIndex, CHUNK_FTS_TABLE, TITLE_TRIGRAM_TABLE
 from services.embedding_service import EmbeddingService
 
+# Serializes on-the-fly embed_texts calls for chunks without stored
+# vectors; stored-vector lookups run concurrently
+_fallback_embed_lock = threading.Lock()
+
+# Embeddings computed for chunks without stored index vectors, keyed by a
+# hash of the chunk text so edited chunks are never served a stale vector
+FALLBACK_EMBEDDING_CACHE_SIZE = 4096
+_fallback_embedding_cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+_fallback_embedding_cache_lock = threading.Lock()
+
+# Intent/domain counts behind search suggestions; they change slowly, so
+# the aggregate queries are rerun at most once per TTL
+SUGGESTION_CACHE_TTL_SECONDS = 300
+_suggestion_cache: Dict[str, Tuple[float, List[str], List[str]]] = {}
+_suggestion_cache_lock = threading.Lock()
+
+
+def clear_suggestion_cache():
+    """Drop the cached suggestion terms (call after chunk labels or documents change)"""
+    with _suggestion_cache_lock:
+        _suggestion_cache.clear()
+
+# Characters either side of a query word considered for a text preview
+PREVIEW_CONTEXT_CHARS = 50
+
+# Chunk ids per query when fetching texts for chunks without stored vectors
+CHUNK_FETCH_BATCH_SIZE = 500
+
+FTS_TERM_PATTERN = re.compile(r"\w+")
+
+# Which full-text index tables exist (checked once per process)
+_fts_tables_available: Dict[str, bool] = {}
+
+@lru_cache(maxsize=256)
+def _compile_query_terms(query: str) -> Tuple[Tuple[str, ...], Optional[Pattern], Dict[str, Tuple[str, ...]]]:
+    """
+    Compile a query's words into one pattern for text previews
+    
+    The pattern matches, at each position, the longest query word starting
+    there (a lookahead, so matches may overlap); prefix_words maps each
+    word to the query words it begins with, which start there too. Cached,
+    so all result previews of a search share one compiled pattern.
+    
+    Returns:
+        Tuple: (query words, pattern or None for an empty query, prefix_words)
+    """
+    query_words = tuple(query.lower().split())
+    unique_words = sorted(set(query_words), key=len, reverse=True)
+    if not unique_words:
+        return query_words, None, {}
+    
+    pattern = re.compile("(?=(" + "|".join(map(re.escape, unique_words)) + "))")
+    prefix_words = {word: tuple(w for w in unique_words if word.startswith(w)) for word in unique_words}
+    return query_words, pattern, prefix_words
+
 class SearchService:
     """Enhanced search service with proper result handling and debugging"""
     
@@ -46,13 +110,10 @@ class SearchService:
             print(f"   Top K: {top_k}")
             
             # First, let's check if we have any data in the database
-            total_docs = self.db.query(Document).count()
-            total_chunks = self.db.query(Chunk).count()
-            indexed_docs = self.db.query(Document).filter(Document.status == 'indexed').count()
-            
-            print(f"📊 Database stats: {total_docs} docs, {total_chunks} chunks, {indexed_docs} indexed")
+            if Config.DEBUG:
+                self._print_database_stats()
             
-            if total_chunks == 0:
+            if not self._has_chunks():
                 return {
                     "query": query,
                     "search_type": "semantic",
@@ -63,19 +124,12 @@ class SearchService:
                     "debug_info": "No chunks found in database"
                 }
             
-            # Build base query for chunks with proper joins
+            # Build base query for chunks with proper joins; only the columns
+            # needed for scoring, text and the rest are fetched for the hits
             base_query = self.db.query(
                 Chunk.id,
                 Chunk.document_id,
-                Chunk.chunk_ix,
-                Chunk.text,
-                Chunk.summary,
-                Chunk.intent_label,
-                Chunk.heading,
-                Chunk.subheading,
-                Document.title,
-                Document.version,
-                Document.slug
+                Chunk.chunk_ix
             ).join(Document, Chunk.document_id == Document.id)
             
             # Apply filters
@@ -116,10 +170,14 @@ class SearchService:
                 else:
                     print("⚠️ Semantic search returned no results, falling back to keyword search")
             
-            # If no semantic results, fall back to keyword search
+            # If no semantic results, fall back to keyword search (in a worker
+            # thread with its own session; it only runs when it is needed)
             if not results:
                 print("🔤 Performing keyword search...")
-                results = self._perform_keyword_search(query, all_chunks, top_k)
+                results = await asyncio.to_thread(
+                    self._run_with_own_session, SearchService._perform_keyword_search,
+                    query, top_k, document_slug, intent_filter
+                )
                 print(f"📝 Found {len(results)} keyword results")
             
             # Format results
@@ -174,82 +232,312 @@ class SearchService:
             if not self.embedding_service:
                 return []
             
-            # Extract texts and generate query embedding
-            chunk_texts = [chunk.text for chunk in chunks]
-            query_embedding = self.embedding_service.embed_texts([query])
+            # Model calls block, so they run off the event loop
+            loop = asyncio.get_running_loop()
+            
+            # Generate query embedding
+            query_embedding = await loop.run_in_executor(None, self.embedding_service.embed_query, query)
             
             if query_embedding.shape[0] == 0:
                 print("⚠️ Failed to generate query embedding")
                 return []
             
-            # Generate embeddings for all chunk texts
-            chunk_embeddings = self.embedding_service.embed_texts(chunk_texts)
+            # Look up the chunk embeddings stored at index time
+            chunk_embeddings = await loop.run_in_executor(None, self._get_chunk_embeddings, chunks)
             
             if chunk_embeddings.shape[0] == 0:
                 print("⚠️ Failed to generate chunk embeddings")
                 return []
             
-            # Calculate similarities
-            similarities = chunk_embeddings @ query_embedding.T
-            similarities = similarities.flatten()
+            # Calculate similarities (vectors are unit-norm, so this is cosine)
+            similarities = chunk_embeddings @ query_embedding.ravel()
+            
+            # Select the top_k rows above the threshold without sorting them all
+            matches = self._select_top_matches(similarities, top_k, similarity_threshold)
             
             # Create results with similarity scores
+            rows = self._get_result_rows([chunks[i].id for i in matches])
             results = []
-            for i, (chunk, similarity) in enumerate(zip(chunks, similarities)):
-                if similarity >= similarity_threshold:
-                    result = {
-                        "chunk_id": chunk.id,
-                        "document_id": chunk.document_id,
-                        "document_title": chunk.title,
-                        "document_version": chunk.version,
-                        "chunk_index": chunk.chunk_ix,
-                        "similarity_score": float(similarity),
-                        "text_preview": self._create_text_preview(chunk.text, query),
-                        "full_text": chunk.text,
-                        "intent_label": chunk.intent_label,
-                        "heading": chunk.heading,
-                        "subheading": chunk.subheading,
-                        "summary": chunk.summary
-                    }
-                    results.append(result)
-            
-            # Sort by similarity score (descending)
-            results.sort(key=lambda x: x["similarity_score"], reverse=True)
+            for i in matches:
+                chunk = rows[chunks[i].id]
+                results.append(self._build_result(chunk, chunk.title, chunk.version, float(similarities[i]), query))
             
-            print(f"🎯 Semantic search found {len(results)} results above threshold {similarity_threshold}")
-            return results[:top_k]
+            print(f"🎯 Semantic search found {matches.size} top results above threshold {similarity_threshold}")
+            return results
             
         except Exception as e:
             print(f"❌ Error in semantic search: {e}")
             return []
 
-    def _perform_keyword_search(self, query: str, chunks: List, top_k: int) -> List[Dict[str, Any]]:
-        """Perform keyword-based search as fallback"""
+    @staticmethod
+    def _select_top_matches(similarities: np.ndarray, top_k: int, similarity_threshold: float) -> np.ndarray:
+        """Get the indices of the top_k similarities at or above the threshold, best first"""
+        matches = np.flatnonzero(similarities >= similarity_threshold)
+        return SearchService._top_k_indices(similarities, matches, top_k)
+
+    @staticmethod
+    def _top_k_indices(scores: np.ndarray, candidates: np.ndarray, top_k: int) -> np.ndarray:
+        """
+        Order the top_k candidate indices by score, best first
+        
+        argpartition selects the top_k in O(N); only those k are then sorted
+        """
+        if candidates.size > top_k:
+            candidates = candidates[np.argpartition(-scores[candidates], top_k)[:top_k]]
+        return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+    async def semantic_search_batch(self, queries: List[str], document_slug: str = None,
+                                    intent_filter: str = None, top_k: int = 10,
+                                    similarity_threshold: float = 0.5) -> Dict[str, Any]:
+        """
+        Perform semantic search for several queries at once
+        
+        The queries are embedded in one model call and scored with one
+        matrix product against the filtered chunks' stored vectors; result
+        rows for all hits are fetched in one query. There is no keyword
+        fallback: queries without semantic hits get an empty result list.
+        
+        Args:
+            queries (List[str]): Search queries
+            document_slug (str, optional): Specific document to search
+            intent_filter (str, optional): Filter by intent label
+            top_k (int): Number of results to return per query
+            similarity_threshold (float): Minimum similarity score
+            
+        Returns:
+            Dict[str, Any]: Per-query search results, in query order
+        
+        Example:
+            batch = await service.semantic_search_batch(
+                ["authentication requirements", "data retention"], top_k=5
+            )
+        """
+        try:
+            start_time = time.time()
+            results = [[] for _ in queries]
+            
+            base_query = self.db.query(
+                Chunk.id,
+                Chunk.document_id,
+                Chunk.chunk_ix
+            ).join(Document, Chunk.document_id == Document.id)
+            if document_slug:
+                base_query = base_query.filter(Document.slug == document_slug)
+            if intent_filter:
+                base_query = base_query.filter(Chunk.intent_label == intent_filter)
+            chunks = base_query.all()
+            
+            if chunks and queries and self.embedding_service:
+                loop = asyncio.get_running_loop()
+                query_embeddings = await loop.run_in_executor(
+                    None, self.embedding_service.embed_texts, list(queries)
+                )
+                chunk_embeddings = await loop.run_in_executor(
+                    None, self._get_chunk_embeddings, chunks
+                )
+                
+                if query_embeddings.shape[0] == len(queries) and chunk_embeddings.shape[0] == len(chunks):
+                    similarities = chunk_embeddings @ query_embeddings.T
+                    matches = [
+                        self._select_top_matches(similarities[:, q], top_k, similarity_threshold)
+                        for q in range(len(queries))
+                    ]
+                    rows = self._get_result_rows(list({chunks[i].id for m in matches for i in m}))
+                    
+                    for q, query in enumerate(queries):
+                        for i in matches[q]:
+                            chunk = rows[chunks[i].id]
+                            results[q].append(self._build_result(
+                                chunk, chunk.title, chunk.version, float(similarities[i, q]), query
+                            ))
+            
+            print(f"🎯 Batch semantic search: {len(queries)} queries over {len(chunks)} chunks")
+            
+            return {
+                "search_type": "semantic",
+                "processing_time_ms": round((time.time() - start_time) * 1000, 2),
+                "searches": [
+                    {
+                        "query": query,
+                        "search_type": "semantic",
+                        "total_results": len(query_results),
+                        "results": query_results
+                    }
+                    for query, query_results in zip(queries, results)
+                ]
+            }
+            
+        except Exception as e:
+            print(f"❌ Error in batch semantic search: {e}")
+            return {
+                "search_type": "error",
+                "processing_time_ms": 0,
+                "searches": [],
+                "error": str(e)
+            }
+
+    def _get_result_rows(self, chunk_ids: List[int]) -> Dict[int, Any]:
+        """Fetch the full result columns for the given chunks, keyed by chunk id"""
+        if not chunk_ids:
+            return {}
+        
+        rows = self._chunk_result_query().filter(Chunk.id.in_(chunk_ids)).all()
+        
+        return {row.id: row for row in rows}
+
+    def _chunk_result_query(self):
+        """
+        Query for the columns every search result is built from (chunk fields
+        plus document title and version); the chunk's JSON analysis columns
+        are never loaded
+        """
+        return self.db.query(
+            Chunk.id,
+            Chunk.document_id,
+            Chunk.chunk_ix,
+            Chunk.text,
+            Chunk.summary,
+            Chunk.intent_label,
+            Chunk.heading,
+            Chunk.subheading,
+            Document.title,
+            Document.version
+        ).join(Document, Chunk.document_id == Document.id)
+
+    def _has_chunks(self) -> bool:
+        """Check whether any chunk exists (a single-row probe, not a count)"""
+        return self.db.query(Chunk.id).limit(1).first() is not None
+
+    def _print_database_stats(self):
+        """Print document/chunk counts (debug mode only; each is a full count)"""
+        total_docs = self.db.query(Document).count()
+        total_chunks = self.db.query(Chunk).count()
+        indexed_docs = self.db.query(Document).filter(Document.status == 'indexed').count()
+        
+        print(f"📊 Database stats: {total_docs} docs, {total_chunks} chunks, {indexed_docs} indexed")
+
+    def _get_chunk_embeddings(self, chunks: List) -> np.ndarray:
+        """
+        Get embeddings for chunks from their documents' stored index vectors
+        
+        Row i of a document's stored embeddings belongs to the chunk with
+        chunk_ix i. Only chunks whose document has no usable stored
+        embeddings are embedded on the fly.
+        """
+        dim = self.embedding_service.embedding_dim
+        embeddings = np.zeros((len(chunks), dim), dtype=np.float32)
+        
+        positions_by_doc = defaultdict(list)
+        for pos, chunk in enumerate(chunks):
+            positions_by_doc[chunk.document_id].append(pos)
+        
+        missing = []
+        for document_id, positions in positions_by_doc.items():
+            stored = self.embedding_service.get_chunk_embeddings(document_id)
+            chunk_ixs = np.fromiter((chunks[pos].chunk_ix for pos in positions), dtype=np.int64)
+            if stored is None or stored.shape[1] != dim or chunk_ixs.max() >= stored.shape[0]:
+                missing.extend(positions)
+                continue
+            embeddings[positions] = stored[chunk_ixs]
+        
+        if missing:
+            self._embed_missing_chunks(chunks, missing, embeddings)
+        
+        return embeddings
+
+    def _embed_missing_chunks(self, chunks: List, positions: List[int], embeddings: np.ndarray):
+        """Fill embeddings rows for chunks without stored vectors, via the text-hash cache"""
+        texts = self._get_chunk_texts([chunks[pos].id for pos in positions])
+        keys = {pos: hashlib.blake2b(texts[chunks[pos].id].encode('utf-8'), digest_size=16).digest()
+                for pos in positions}
+        
+        uncached = []
+        with _fallback_embedding_cache_lock:
+            for pos in positions:
+                cached = _fallback_embedding_cache.get(keys[pos])
+                if cached is not None and cached.shape[0] == embeddings.shape[1]:
+                    _fallback_embedding_cache.move_to_end(keys[pos])
+                    embeddings[pos] = cached
+                else:
+                    uncached.append(pos)
+        
+        if not uncached:
+            return
+        
+        print(f"⚠️ No stored embeddings for {len(uncached)} chunks, embedding them now")
+        with _fallback_embed_lock:
+            embedded = self.embedding_service.embed_texts([texts[chunks[pos].id] for pos in uncached])
+        embeddings[uncached] = embedded
+        
+        # Zero rows are embed_texts' failure fallback; don't cache them
+        with _fallback_embedding_cache_lock:
+            for pos, vector in zip(uncached, embedded):
+                if np.any(vector):
+                    _fallback_embedding_cache[keys[pos]] = vector
+                    _fallback_embedding_cache.move_to_end(keys[pos])
+            while len(_fallback_embedding_cache) > FALLBACK_EMBEDDING_CACHE_SIZE:
+                _fallback_embedding_cache.popitem(last=False)
+
+    def _get_chunk_texts(self, chunk_ids: List[int]) -> Dict[int, str]:
+        """Fetch chunk texts by id, streamed in batches of CHUNK_FETCH_BATCH_SIZE ids"""
+        texts = {}
+        for start in range(0, len(chunk_ids), CHUNK_FETCH_BATCH_SIZE):
+            batch = chunk_ids[start:start + CHUNK_FETCH_BATCH_SIZE]
+            for chunk_id, chunk_text in self.db.query(Chunk.id, Chunk.text).filter(
+                Chunk.id.in_(batch)
+            ).yield_per(CHUNK_FETCH_BATCH_SIZE):
+                texts[chunk_id] = chunk_text
+        return texts
+
+    def _perform_keyword_search(self, query: str, top_k: int, document_slug: str = None,
+                                intent_filter: str = None) -> List[Dict[str, Any]]:
+        """Perform keyword-based search as fallback (candidates in full-text rank order, rescored)"""
         try:
             query_lower = query.lower().strip()
             query_words = query_lower.split()
             
-            results = []
+            if not query_words:
+                return []
             
-            for chunk in chunks:
+            chunk_query = self._chunk_result_query()
+            
+            if document_slug:
+                chunk_query = chunk_query.filter(Document.slug == document_slug)
+            if intent_filter:
+                chunk_query = chunk_query.filter(Chunk.intent_label == intent_filter)
+            
+            # Each distinct word is checked once per text (weighted by how often
+            # the query repeats it)
+            word_counts = Counter(query_words)
+            
+            # Only chunks containing a query word (as a substring) can score.
+            # SQLite's LIKE folds ASCII case only, so the filter is pushed
+            # into SQL for ASCII queries; the check below stays authoritative
+            if query_lower.isascii():
+                chunk_query = chunk_query.filter(or_(*(Chunk.text.like(f"%{word}%") for word in word_counts)))
+            chunk_query = self._order_by_fts_rank(chunk_query, self._fts_match(query))
+            
+            chunks = chunk_query.all()
+            
+            # Scores go into one array (0 = no match); result dicts are built
+            # only for the top_k rows
+            scores = np.zeros(len(chunks), dtype=np.float64)
+            total_words = len(query_words)
+            
+            for i, chunk in enumerate(chunks):
                 # Calculate keyword match score
                 text_lower = chunk.text.lower()
-                summary_lower = (chunk.summary or "").lower()
                 
                 # Count word matches
-                word_matches = 0
-                total_words = len(query_words)
-                
-                for word in query_words:
-                    if word in text_lower:
-                        word_matches += 1
+                word_matches = sum(count for word, count in word_counts.items() if word in text_lower)
                 
                 # Calculate score based on word matches and text length
                 if word_matches > 0:
                     base_score = word_matches / total_words
                     
                     # Boost score if summary also contains matches
-                    summary_matches = sum(1 for word in query_words if word in summary_lower)
+                    summary_lower = (chunk.summary or "").lower()
+                    summary_matches = sum(count for word, count in word_counts.items() if word in summary_lower)
                     if summary_matches > 0:
                         base_score += 0.1 * (summary_matches / total_words)
                     
@@ -258,57 +546,133 @@ class SearchService:
                         base_score += 0.3
                     
                     # Normalize score to 0-1 range
-                    similarity_score = min(1.0, base_score)
-                    
-                    result = {
-                        "chunk_id": chunk.id,
-                        "document_id": chunk.document_id,
-                        "document_title": chunk.title,
-                        "document_version": chunk.version,
-                        "chunk_index": chunk.chunk_ix,
-                        "similarity_score": similarity_score,
-                        "text_preview": self._create_text_preview(chunk.text, query),
-                        "full_text": chunk.text,
-                        "intent_label": chunk.intent_label,
-                        "heading": chunk.heading,
-                        "subheading": chunk.subheading,
-                        "summary": chunk.summary
-                    }
-                    results.append(result)
-            
-            # Sort by similarity score (descending)
-            results.sort(key=lambda x: x["similarity_score"], reverse=True)
+                    scores[i] = min(1.0, base_score)
+            
+            # Sort matches by similarity score (descending)
+            matched = np.flatnonzero(scores > 0)
+            top = self._top_k_indices(scores, matched, top_k)
+            results = [
+                self._build_result(chunks[i], chunks[i].title, chunks[i].version, float(scores[i]), query)
+                for i in top
+            ]
             
-            print(f"🔤 Keyword search found {len(results)} results")
-            return results[:top_k]
+            print(f"🔤 Keyword search found {matched.size} results")
+            return results
             
         except Exception as e:
             print(f"❌ Error in keyword search: {e}")
             return []
 
+    def _has_fts_table(self, fts_table: str = CHUNK_FTS_TABLE) -> bool:
+        """Check whether a full-text index table (see database.FTS_INDEXES) exists"""
+        available = _fts_tables_available.get(fts_table)
+        if available is None:
+            available = self.db.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": fts_table}
+            ).first() is not None
+            _fts_tables_available[fts_table] = available
+        return available
+
+    @staticmethod
+    def _fts_match(query: str, column_name: str = None, phrase: bool = False) -> Optional[str]:
+        """
+        Build an FTS5 MATCH expression from a search query
+        
+        Words are matched as prefixes, either any of them or (phrase=True)
+        all of them in sequence; column_name restricts the match to one
+        indexed column. Returns None if the query has no searchable words.
+        """
+        terms = FTS_TERM_PATTERN.findall(query.lower())
+        if not terms:
+            return None
+        
+        if phrase:
+            expression = '"' + " ".join(terms) + '"*'
+        else:
+            expression = " OR ".join(f'"{term}"*' for term in terms)
+        return f"{column_name} : ({expression})" if column_name else expression
+
+    def _order_by_fts_rank(self, chunk_query, match: Optional[str]):
+        """
+        Order a chunk query by full-text rank (bm25, best first) without
+        narrowing it: rows the index does not match (e.g. a substring inside
+        a word) keep their place after the ranked ones
+        """
+        if match is None or not self._has_fts_table():
+            return chunk_query
+        ranked = self._fts_ranked_chunks(match)
+        return chunk_query.outerjoin(ranked, ranked.c.chunk_id == Chunk.id).order_by(
+            ranked.c.rank.is_(None), ranked.c.rank
+        )
+
+    @staticmethod
+    def _fts_ranked_chunks(match: str):
+        """Subquery of chunk ids matching an FTS5 expression, with their bm25 rank (lower is better)"""
+        fts = table(CHUNK_FTS_TABLE, column("rowid"))
+        return select(
+            fts.c.rowid.label("chunk_id"),
+            literal_column(f"bm25({CHUNK_FTS_TABLE})").label("rank")
+        ).select_from(fts).where(
+            text(f"{CHUNK_FTS_TABLE} MATCH :match").bindparams(match=match)
+        ).subquery()
+
+    def _build_result(self, chunk: Any, document_title: str, document_version: int,
+                      similarity_score: float, query: str) -> Dict[str, Any]:
+        """Build a search result dict for a chunk row"""
+        return {
+            "chunk_id": chunk.id,
+            "document_id": chunk.document_id,
+            "document_title": document_title,
+            "document_version": document_version,
+            "chunk_index": chunk.chunk_ix,
+            "similarity_score": similarity_score,
+            "text_preview": self._create_text_preview(chunk.text, query),
+            "full_text": chunk.text,
+            "intent_label": chunk.intent_label,
+            "heading": chunk.heading,
+            "subheading": chunk.subheading,
+            "summary": chunk.summary
+        }
+
     def _create_text_preview(self, text: str, query: str, max_length: int = 200) -> str:
         """Create a text preview highlighting query terms"""
         try:
-            query_words = query.lower().split()
+            query_words, pattern, prefix_words = _compile_query_terms(query)
             text_lower = text.lower()
             
             # Find the best position to start the preview
             best_pos = 0
             best_score = 0
             
-            # Look for positions that contain query words
-            for word in query_words:
-                pos = text_lower.find(word)
-                if pos >= 0:
-                    # Count nearby query words
-                    start = max(0, pos - 50)
-                    end = min(len(text), pos + 50)
-                    snippet = text_lower[start:end]
+            if pattern is not None:
+                # One scan finds every position where a query word starts (the
+                # longest word there; shorter words it begins with match too)
+                starts = defaultdict(list)
+                for match in pattern.finditer(text_lower):
+                    for word in prefix_words[match.group(1)]:
+                        starts[word].append(match.start())
+                
+                # Look for positions that contain query words
+                for word in query_words:
+                    if word not in starts:
+                        continue
+                    pos = starts[word][0]
+                    
+                    # Count nearby query words (occurrences inside the window)
+                    start = max(0, pos - PREVIEW_CONTEXT_CHARS)
+                    end = min(len(text), pos + PREVIEW_CONTEXT_CHARS)
+                    score = 0
+                    for w in query_words:
+                        positions = starts.get(w)
+                        if positions:
+                            i = bisect_left(positions, start)
+                            if i < len(positions) and positions[i] + len(w) <= end:
+                                score += 1
                     
-                    score = sum(1 for w in query_words if w in snippet)
                     if score > best_score:
                         best_score = score
-                        best_pos = max(0, pos - 50)
+                        best_pos = start
             
             # Create preview
             preview_start = best_pos
@@ -347,12 +711,10 @@ class SearchService:
             print(f"🌐 Starting global search for: '{query}' (scope: {search_scope})")
             
             # Check database state
-            total_docs = self.db.query(Document).count()
-            total_chunks = self.db.query(Chunk).count()
-            
-            print(f"📊 Database stats: {total_docs} docs, {total_chunks} chunks")
+            if Config.DEBUG:
+                self._print_database_stats()
             
-            if total_chunks == 0:
+            if not self._has_chunks():
                 return {
                     "query": query,
                     "search_type": "global",
@@ -365,11 +727,11 @@ class SearchService:
             
             # Build query based on search scope
             if search_scope == "titles":
-                results = await self._search_document_titles(query, filters, top_k)
+                results = self._search_document_titles(query, filters, top_k)
             elif search_scope == "summaries":
-                results = await self._search_summaries(query, filters, top_k)
+                results = self._search_summaries(query, filters, top_k)
             elif search_scope == "content":
-                results = await self._search_content(query, filters, top_k)
+                results = self._search_content(query, filters, top_k)
             else:  # search_scope == "all"
                 results = await self._search_all_content(query, filters, top_k)
             
@@ -398,15 +760,24 @@ class SearchService:
                 "error": str(e)
             }
 
-    async def _search_document_titles(self, query: str, filters: Dict[str, Any], top_k: int) -> List[Dict[str, Any]]:
+    def _search_document_titles(self, query: str, filters: Dict[str, Any], top_k: int) -> List[Dict[str, Any]]:
         """Search in document titles"""
         try:
             query_lower = query.lower()
             
+            # SQLite LIKE is case-insensitive (ASCII, like its lower()), so the
+            # column is matched as stored instead of lower()-copied per row
             base_query = self.db.query(Document).filter(
-                func.lower(Document.title).like(f"%{query_lower}%")
+                Document.title.like(f"%{query_lower}%")
             )
             
+            # Narrow to trigram index hits first (substring LIKE on the index)
+            if self._has_fts_table(TITLE_TRIGRAM_TABLE):
+                trigram = table(TITLE_TRIGRAM_TABLE, column("rowid"), column("title"))
+                base_query = base_query.filter(Document.id.in_(
+                    select(trigram.c.rowid).where(trigram.c.title.like(f"%{query_lower}%"))
+                ))
+            
             # Apply additional filters
             if filters:
                 if filters.get("domain"):
@@ -424,21 +795,8 @@ class SearchService:
                 ).order_by(Chunk.chunk_ix).first()
                 
                 if chunk:
-                    result = {
-                        "chunk_id": chunk.id,
-                        "document_id": doc.id,
-                        "document_title": doc.title,
-                        "document_version": doc.version,
-                        "chunk_index": chunk.chunk_ix,
-                        "similarity_score": 0.8,  # High score for title matches
-                        "text_preview": self._create_text_preview(chunk.text, query),
-                        "full_text": chunk.text,
-                        "intent_label": chunk.intent_label,
-                        "heading": chunk.heading,
-                        "subheading": chunk.subheading,
-                        "summary": chunk.summary
-                    }
-                    results.append(result)
+                    # High score for title matches
+                    results.append(self._build_result(chunk, doc.title, doc.version, 0.8, query))
             
             return results
             
@@ -446,48 +804,29 @@ class SearchService:
             print(f"❌ Error searching titles: {e}")
             return []
 
-    async def _search_summaries(self, query: str, filters: Dict[str, Any], top_k: int) -> List[Dict[str, Any]]:
+    def _search_summaries(self, query: str, filters: Dict[str, Any], top_k: int) -> List[Dict[str, Any]]:
         """Search in chunk summaries"""
         try:
             query_lower = query.lower()
             
-            base_query = self.db.query(
-                Chunk.id,
-                Chunk.document_id,
-                Chunk.chunk_ix,
-                Chunk.text,
-                Chunk.summary,
-                Chunk.intent_label,
-                Chunk.heading,
-                Chunk.subheading,
-                Document.title,
-                Document.version
-            ).join(Document, Chunk.document_id == Document.id).filter(
+            base_query = self._chunk_result_query().filter(
                 and_(
                     Chunk.summary.isnot(None),
-                    func.lower(Chunk.summary).like(f"%{query_lower}%")
+                    Chunk.summary.like(f"%{query_lower}%")
                 )
             )
             
+            # The LIKE filter decides the matches; full-text rank orders them
+            base_query = self._order_by_fts_rank(
+                base_query, self._fts_match(query, column_name="summary", phrase=True)
+            )
+            
             chunks = base_query.limit(top_k).all()
             
             results = []
             for chunk in chunks:
-                result = {
-                    "chunk_id": chunk.id,
-                    "document_id": chunk.document_id,
-                    "document_title": chunk.title,
-                    "document_version": chunk.version,
-                    "chunk_index": chunk.chunk_ix,
-                    "similarity_score": 0.7,  # Good score for summary matches
-                    "text_preview": self._create_text_preview(chunk.text, query),
-                    "full_text": chunk.text,
-                    "intent_label": chunk.intent_label,
-                    "heading": chunk.heading,
-                    "subheading": chunk.subheading,
-                    "summary": chunk.summary
-                }
-                results.append(result)
+                # Good score for summary matches
+                results.append(self._build_result(chunk, chunk.title, chunk.version, 0.7, query))
             
             return results
             
@@ -495,69 +834,53 @@ class SearchService:
             print(f"❌ Error searching summaries: {e}")
             return []
 
-    async def _search_content(self, query: str, filters: Dict[str, Any], top_k: int) -> List[Dict[str, Any]]:
+    def _search_content(self, query: str, filters: Dict[str, Any], top_k: int) -> List[Dict[str, Any]]:
         """Search in chunk content"""
         try:
             query_lower = query.lower()
             
-            base_query = self.db.query(
-                Chunk.id,
-                Chunk.document_id,
-                Chunk.chunk_ix,
-                Chunk.text,
-                Chunk.summary,
-                Chunk.intent_label,
-                Chunk.heading,
-                Chunk.subheading,
-                Document.title,
-                Document.version
-            ).join(Document, Chunk.document_id == Document.id).filter(
-                func.lower(Chunk.text).like(f"%{query_lower}%")
+            base_query = self._chunk_result_query().filter(
+                Chunk.text.like(f"%{query_lower}%")
+            )
+            
+            # The LIKE filter decides the matches; full-text rank orders them
+            base_query = self._order_by_fts_rank(
+                base_query, self._fts_match(query, column_name="text", phrase=True)
             )
             
             chunks = base_query.limit(top_k * 2).all()  # Get more for scoring
             
-            # Score and rank results
-            results = []
-            for chunk in chunks:
+            # Score and rank results; result dicts are built only for the top_k
+            query_words = query_lower.split()
+            word_counts = Counter(query_words)
+            scores = np.zeros(len(chunks), dtype=np.float64)
+            for i, chunk in enumerate(chunks):
                 # Calculate relevance score
                 text_lower = chunk.text.lower()
                 score = 0.0
                 
-                # Exact phrase match
-                if query_lower in text_lower:
+                # Exact phrase match (one scan gives the match and its position)
+                first_match_pos = text_lower.find(query_lower)
+                if first_match_pos >= 0:
                     score += 0.5
                 
                 # Word matches
-                query_words = query_lower.split()
-                word_matches = sum(1 for word in query_words if word in text_lower)
+                word_matches = sum(count for word, count in word_counts.items() if word in text_lower)
                 score += (word_matches / len(query_words)) * 0.3
                 
                 # Position bonus (earlier matches are better)
-                first_match_pos = text_lower.find(query_lower)
                 if first_match_pos >= 0:
                     position_score = 1.0 - (first_match_pos / len(text_lower))
                     score += position_score * 0.2
                 
-                result = {
-                    "chunk_id": chunk.id,
-                    "document_id": chunk.document_id,
-                    "document_title": chunk.title,
-                    "document_version": chunk.version,
-                    "chunk_index": chunk.chunk_ix,
-                    "similarity_score": round(score, 3),
-                    "text_preview": self._create_text_preview(chunk.text, query),
-                    "full_text": chunk.text,
-                    "intent_label": chunk.intent_label,
-                    "heading": chunk.heading,
-                    "subheading": chunk.subheading,
-                    "summary": chunk.summary
-                }
-                results.append(result)
+                scores[i] = round(score, 3)
             
             # Sort by score and return top results
-            results.sort(key=lambda x: x["similarity_score"], reverse=True)
-            return results[:top_k]
+            top = self._top_k_indices(scores, np.arange(len(chunks)), top_k)
+            return [
+                self._build_result(chunks[i], chunks[i].title, chunks[i].version, float(scores[i]), query)
+                for i in top
+            ]
             
         except Exception as e:
             print(f"❌ Error searching content: {e}")
@@ -566,10 +889,16 @@ class SearchService:
     async def _search_all_content(self, query: str, filters: Dict[str, Any], top_k: int) -> List[Dict[str, Any]]:
         """Search across all content types"""
         try:
-            # Perform searches in different scopes
-            title_results = await self._search_document_titles(query, filters, max(5, top_k // 4))
-            summary_results = await self._search_summaries(query, filters, max(5, top_k // 4))
-            content_results = await self._search_content(query, filters, max(10, top_k // 2))
+            # Perform searches in different scopes concurrently, each in a
+            # worker thread with its own session
+            title_results, summary_results, content_results = await asyncio.gather(
+                asyncio.to_thread(self._run_with_own_session, SearchService._search_document_titles,
+                                  query, filters, max(5, top_k // 4)),
+                asyncio.to_thread(self._run_with_own_session, SearchService._search_summaries,
+                                  query, filters, max(5, top_k // 4)),
+                asyncio.to_thread(self._run_with_own_session, SearchService._search_content,
+                                  query, filters, max(10, top_k // 2))
+            )
             
             # Combine and deduplicate results
             all_results = []
@@ -595,40 +924,35 @@ class SearchService:
                     seen_chunks.add(result["chunk_id"])
             
             # Sort by similarity score and return top results
-            all_results.sort(key=lambda x: x["similarity_score"], reverse=True)
-            return all_results[:top_k]
+            return heapq.nlargest(top_k, all_results, key=lambda x: x["similarity_score"])
             
         except Exception as e:
             print(f"❌ Error in comprehensive search: {e}")
             return []
 
+    def _run_with_own_session(self, search: Callable[..., Any], *args) -> Any:
+        """
+        Run a synchronous search method on a new session bound to the same
+        database; sessions are not thread-safe, so worker threads each need one
+        """
+        session = Session(bind=self.db.get_bind())
+        try:
+            return search(SearchService(session, self.embedding_service), *args)
+        finally:
+            session.close()
+
     def _generate_search_suggestions(self, query: str) -> List[str]:
         """Generate search suggestions based on available content"""
         try:
             suggestions = []
+            intents, domains = self._get_suggestion_terms()
             
-            # Get common intent labels
-            intent_results = self.db.query(
-                Chunk.intent_label,
-                func.count(Chunk.id).label('count')
-            ).filter(
-                Chunk.intent_label.isnot(None)
-            ).group_by(Chunk.intent_label).order_by(text('count DESC')).limit(5).all()
-            
-            for intent, count in intent_results:
-                if intent and intent.lower() not in query.lower():
+            for intent in intents:
+                if intent.lower() not in query.lower():
                     suggestions.append(f"intent:{intent}")
             
-            # Get common domains
-            domain_results = self.db.query(
-                Document.domain,
-                func.count(Document.id).label('count')
-            ).filter(
-                Document.domain.isnot(None)
-            ).group_by(Document.domain).order_by(text('count DESC')).limit(3).all()
-            
-            for domain, count in domain_results:
-                if domain and domain.lower() not in query.lower():
+            for domain in domains:
+                if domain.lower() not in query.lower():
                     suggestions.append(f"domain:{domain}")
             
             return suggestions[:5]
@@ -637,6 +961,38 @@ class SearchService:
             print(f"⚠️ Error generating suggestions: {e}")
             return []
 
+    def _get_suggestion_terms(self) -> Tuple[List[str], List[str]]:
+        """Get the most common intent labels and domains (cached for SUGGESTION_CACHE_TTL_SECONDS)"""
+        now = time.monotonic()
+        with _suggestion_cache_lock:
+            cached = _suggestion_cache.get("terms")
+            if cached is not None and now - cached[0] < SUGGESTION_CACHE_TTL_SECONDS:
+                return cached[1], cached[2]
+        
+        # Get common intent labels
+        intent_results = self.db.query(
+            Chunk.intent_label,
+            func.count(Chunk.id).label('count')
+        ).filter(
+            Chunk.intent_label.isnot(None)
+        ).group_by(Chunk.intent_label).order_by(text('count DESC')).limit(5).all()
+        
+        # Get common domains
+        domain_results = self.db.query(
+            Document.domain,
+            func.count(Document.id).label('count')
+        ).filter(
+            Document.domain.isnot(None)
+        ).group_by(Document.domain).order_by(text('count DESC')).limit(3).all()
+        
+        intents = [intent for intent, count in intent_results if intent]
+        domains = [domain for domain, count in domain_results if domain]
+        
+        with _suggestion_cache_lock:
+            _suggestion_cache["terms"] = (now, intents, domains)
+        
+        return intents, domains
+
     async def get_search_stats(self) -> Dict[str, Any]:
         """Get search statistics and indexing status"""
         try:
@@ -686,8 +1042,18 @@ class SearchService:
             }
 
     # Additional debugging methods
-    async def debug_search(self, query: str) -> Dict[str, Any]:
-        """Debug search functionality"""
+    async def debug_search(self, query: str, run_embedding: bool = False) -> Dict[str, Any]:
+        """
+        Debug search functionality
+        
+        Args:
+            query (str): Query to probe the keyword search with
+            run_embedding (bool): Also embed the query (a full model forward
+                pass); otherwise only the loaded model's dimension is reported
+        
+        Returns:
+            Dict[str, Any]: Database counts and search probe results
+        """
         try:
             debug_info = {
                 "query": query,
@@ -706,15 +1072,20 @@ class SearchService:
             
             # Test basic keyword search
             query_lower = query.lower()
-            matching_chunks = self.db.query(Chunk).join(Document).filter(
-                func.lower(Chunk.text).like(f"%{query_lower}%")
+            # The document title comes from the join, not a query per sample
+            matching_chunks = self.db.query(
+                Chunk.id,
+                Chunk.text,
+                Document.title
+            ).join(Document, Chunk.document_id == Document.id).filter(
+                Chunk.text.like(f"%{query_lower}%")
             ).limit(5).all()
             
             debug_info["search_results"]["keyword_matches"] = len(matching_chunks)
             debug_info["search_results"]["sample_matches"] = [
                 {
                     "chunk_id": chunk.id,
-                    "document_title": self.db.query(Document).filter(Document.id == chunk.document_id).first().title,
+                    "document_title": chunk.title,
                     "text_preview": chunk.text[:100] + "..."
                 }
                 for chunk in matching_chunks[:3]
@@ -723,9 +1094,12 @@ class SearchService:
             # Test embedding service if available
             if self.embedding_service:
                 try:
-                    test_embedding = self.embedding_service.embed_texts([query])
+                    if run_embedding:
+                        embedding_shape = self.embedding_service.embed_texts([query]).shape
+                    else:
+                        embedding_shape = (1, self.embedding_service.embedding_dim)
                     debug_info["search_results"]["embedding_available"] = True
-                    debug_info["search_results"]["embedding_shape"] = test_embedding.shape
+                    debug_info["search_results"]["embedding_shape"] = embedding_shape
                 except Exception as e:
                     debug_info["search_results"]["embedding_error"] = str(e)
             else:
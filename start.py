@@ -5,21 +5,80 @@ Easy startup with environment validation and initialization
 """
 import os
 import sys
-import uvicorn
+import json
+import time
+import hashlib
 import argparse
+import sysconfig
+from functools import lru_cache
+from importlib.util import find_spec
 from pathlib import Path
-from rich.console import Console
-from rich.table import Table
-from rich.panel import Panel
-from rich.progress import Progress, SpinnerColumn, TextColumn
 
 # Add app directory to Python path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from config import Config
-from database import init_database
 
-console = Console()
+# uvicorn and rich are imported where they are used, so importing this
+# module (tooling, tests, --help) does not load them
+@lru_cache(maxsize=None)
+def _console():
+    """Get the shared rich console, created on first use"""
+    from rich.console import Console
+    return Console()
+
+# A passed dependency check is remembered per interpreter and site-packages
+# state, so warm boots skip the sys.path walk
+DEPENDENCY_CACHE_DIR = Path.home() / ".cache" / "docureview"
+DEPENDENCY_CACHE_TTL_SECONDS = 24 * 60 * 60
+
+def _dependency_cache_file(packages: list) -> Path:
+    """
+    Get the cache file for a dependency check in this environment
+    
+    Installing or removing a package changes the site-packages mtime and
+    with it the key, so a stale result is never found.
+    """
+    site_packages = sysconfig.get_paths()["purelib"]
+    key_source = f"{sys.executable}|{os.path.getmtime(site_packages)}|{','.join(packages)}"
+    key = hashlib.blake2b(key_source.encode("utf-8"), digest_size=8).hexdigest()
+    return DEPENDENCY_CACHE_DIR / f"env_valid_{key}.json"
+
+def find_missing_packages(packages: list) -> list:
+    """
+    Find which packages are not installed, without importing any of them
+    
+    Args:
+        packages (list): Importable package names
+    
+    Returns:
+        list: Packages that could not be found
+    """
+    try:
+        cache_file = _dependency_cache_file(packages)
+    except OSError:
+        cache_file = None
+    
+    try:
+        if cache_file is not None and time.time() - cache_file.stat().st_mtime < DEPENDENCY_CACHE_TTL_SECONDS:
+            if json.loads(cache_file.read_text()).get("valid"):
+                return []
+    except (OSError, ValueError):
+        pass
+    
+    # find_spec only locates each package; importing them here would load
+    # torch/transformers and the rest just to check they are installed
+    missing = [package for package in packages if find_spec(package.replace("-", "_")) is None]
+    
+    # Only a passing check is cached; failures are re-checked every boot
+    if not missing and cache_file is not None:
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            cache_file.write_text(json.dumps({"valid": True, "packages": packages}))
+        except OSError:
+            pass
+    
+    return missing
 
 def validate_environment() -> bool:
     """
@@ -28,7 +87,7 @@ def validate_environment() -> bool:
     Returns:
         bool: True if environment is valid
     """
-    console.print("\n🔍 [bold blue]Validating Environment...[/bold blue]")
+    _console().print("\n🔍 [bold blue]Validating Environment...[/bold blue]")
     
     issues = []
     warnings = []
@@ -75,17 +134,11 @@ def validate_environment() -> bool:
         issues.append(f"Database directory not accessible: {db_path.parent} - {e}")
     
     # Check Python dependencies
-    missing_deps = []
     required_packages = [
         "fastapi", "uvicorn", "sqlalchemy", "openai", 
         "sentence_transformers", "faiss", "numpy", "pydantic"
     ]
-    
-    for package in required_packages:
-        try:
-            __import__(package.replace("-", "_"))
-        except ImportError:
-            missing_deps.append(package)
+    missing_deps = find_missing_packages(required_packages)
     
     if missing_deps:
         issues.append(f"Missing Python packages: {', '.join(missing_deps)}")
@@ -93,74 +146,23 @@ def validate_environment() -> bool:
     
     # Display results
     if issues:
-        console.print("\n❌ [bold red]Environment Issues Found:[/bold red]")
+        _console().print("\n❌ [bold red]Environment Issues Found:[/bold red]")
         for issue in issues:
-            console.print(f"  • {issue}")
+            _console().print(f"  • {issue}")
         return False
     
     if warnings:
-        console.print("\n⚠️ [bold yellow]Warnings:[/bold yellow]")
+        _console().print("\n⚠️ [bold yellow]Warnings:[/bold yellow]")
         for warning in warnings:
-            console.print(f"  • {warning}")
+            _console().print(f"  • {warning}")
     
-    console.print("✅ [bold green]Environment validation passed![/bold green]")
+    _console().print("✅ [bold green]Environment validation passed![/bold green]")
     return True
 
-def initialize_application() -> bool:
-    """
-    Initialize application database and services
-    
-    Returns:
-        bool: True if initialization successful
-    """
-    console.print("\n🚀 [bold blue]Initializing Application...[/bold blue]")
-    
-    try:
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=console,
-        ) as progress:
-            
-            # Initialize database
-            task1 = progress.add_task("Initializing database...", total=None)
-            init_database()
-            progress.update(task1, completed=100)
-            
-            # Validate configuration
-            task2 = progress.add_task("Validating configuration...", total=None)
-            Config.validate_config()
-            progress.update(task2, completed=100)
-            
-            # Create upload directories
-            task3 = progress.add_task("Creating directories...", total=None)
-            Config.ensure_upload_folder()
-            progress.update(task3, completed=100)
-            
-            # Test AI services (optional)
-            if Config.AZURE_OPENAI_API_KEY:
-                task4 = progress.add_task("Testing AI services...", total=None)
-                try:
-                    from services.llm_service import LLMService
-                    llm_service = LLMService(
-                        endpoint=Config.AZURE_OPENAI_ENDPOINT,
-                        api_key=Config.AZURE_OPENAI_API_KEY,
-                        api_version=Config.AZURE_OPENAI_API_VERSION,
-                        deployment=Config.AZURE_OPENAI_DEPLOYMENT
-                    )
-                    progress.update(task4, completed=100)
-                except Exception as e:
-                    console.print(f"⚠️ AI service test failed: {e}")
-        
-        console.print("✅ [bold green]Application initialized successfully![/bold green]")
-        return True
-        
-    except Exception as e:
-        console.print(f"❌ [bold red]Initialization failed: {e}[/bold red]")
-        return False
-
 def display_startup_info():
     """Display application startup information"""
+    from rich.table import Table
+    from rich.panel import Panel
     
     # Application info table
     info_table = Table(title="DocuReview Pro - Configuration")
@@ -172,11 +174,11 @@ def display_startup_info():
     info_table.add_row("Port", str(Config.PORT))
     info_table.add_row("Debug Mode", "Yes" if Config.DEBUG else "No")
     info_table.add_row("Database", str(Config.get_database_path()))
-    info_table.add_row("Upload Folder", str(Config.ensure_upload_folder()))
+    info_table.add_row("Upload Folder", str(Path(Config.UPLOAD_FOLDER).absolute()))
     info_table.add_row("Chunk Size", str(Config.CHUNK_SIZE))
     info_table.add_row("AI Model", Config.AZURE_OPENAI_DEPLOYMENT)
     
-    console.print(info_table)
+    _console().print(info_table)
     
     # URLs panel
     urls = [
@@ -185,7 +187,7 @@ def display_startup_info():
         f"🔧 Admin Panel: http://{Config.HOST}:{Config.PORT}/admin",
     ]
     
-    console.print(Panel(
+    _console().print(Panel(
         "\n".join(urls),
         title="🚀 Access URLs",
         border_style="green"
@@ -204,8 +206,10 @@ def main():
     
     args = parser.parse_args()
     
+    from rich.panel import Panel
+    
     # Display banner
-    console.print(Panel(
+    _console().print(Panel(
         f"""
 [bold cyan]DocuReview Pro[/bold cyan]
 [blue]Enterprise Document Version Management & Analysis[/blue]
@@ -219,13 +223,11 @@ Python: {sys.version.split()[0]}
     # Environment validation
     if not args.skip_validation:
         if not validate_environment():
-            console.print("\n❌ [bold red]Environment validation failed. Use --skip-validation to bypass.[/bold red]")
+            _console().print("\n❌ [bold red]Environment validation failed. Use --skip-validation to bypass.[/bold red]")
             sys.exit(1)
     
-    # Application initialization
-    if not initialize_application():
-        console.print("\n❌ [bold red]Application initialization failed.[/bold red]")
-        sys.exit(1)
+    # Database and upload folder initialization runs in the app's lifespan
+    # (main.lifespan), after the port is bound
     
     # Update config from args
     if args.debug:
@@ -235,7 +237,18 @@ Python: {sys.version.split()[0]}
     display_startup_info()
     
     # Start server
-    console.print(f"\n🎯 [bold green]Starting server...[/bold green]")
+    _console().print(f"\n🎯 [bold green]Starting server...[/bold green]")
+    
+    workers = args.workers if not (args.reload or Config.DEBUG) else 1
+    
+    # Let each worker size its compute thread pools (FAISS, torch, MKL) for
+    # its share of the cores; workers inherit this environment
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    Config.WORKER_COUNT = workers
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ.setdefault(var, str(Config.get_compute_threads()))
+    
+    import uvicorn
     
     try:
         uvicorn.run(
@@ -243,15 +256,15 @@ Python: {sys.version.split()[0]}
             host=args.host,
             port=args.port,
             reload=args.reload or Config.DEBUG,
-            workers=args.workers if not (args.reload or Config.DEBUG) else 1,
+            workers=workers,
             log_level=args.log_level,
             access_log=True,
             loop="auto"
         )
     except KeyboardInterrupt:
-        console.print("\n👋 [bold yellow]Shutting down gracefully...[/bold yellow]")
+        _console().print("\n👋 [bold yellow]Shutting down gracefully...[/bold yellow]")
     except Exception as e:
-        console.print(f"\n❌ [bold red]Server error: {e}[/bold red]")
+        _console().print(f"\n❌ [bold red]Server error: {e}[/bold red]")
         sys.exit(1)
 
 if __name__ == "__main__":
@@ -0,0 +1,85 @@
+# tests/conftest.py
+"""
+DocuReview Pro - Test Configuration
+Points the app at a throwaway database before any app module is imported
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add app directory to Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Config reads these at import time, so they must be set before it loads
+_test_dir = tempfile.mkdtemp(prefix="docureview-tests-")
+os.environ["DB_PATH"] = os.path.join(_test_dir, "test.db")
+os.environ["UPLOAD_FOLDER"] = os.path.join(_test_dir, "uploads")
+
+@pytest.fixture(scope="session")
+def database():
+    """Initialize the test database (tables and full-text indexes) once"""
+    import database as db_module
+    db_module.init_database()
+    return db_module
+
+@pytest.fixture
+def db_session(database):
+    """Session on the test database; rows added by the test are removed afterwards"""
+    session = database.SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        for model in (database.Chunk, database.File, database.Comparison,
+                      database.AuditLog, database.Document):
+            session.query(model).delete()
+        session.commit()
+        session.close()
+
+@pytest.fixture
+def chunks(db_session, database):
+    """A document with three chunks, keyed by topic"""
+    document = database.Document(slug="search-doc", title="Search Document", version=1)
+    db_session.add(document)
+    db_session.commit()
+    
+    chunks = {
+        "logs": database.Chunk(document_id=document.id, chunk_ix=0, text="Authentication logs are retained",
+                               summary="Retention policy"),
+        "failures": database.Chunk(document_id=document.id, chunk_ix=1, text="Logs of failed authentication",
+                                   summary="Security events"),
+        "scripts": database.Chunk(document_id=document.id, chunk_ix=2, text="Build with JavaScript tooling",
+                                  summary="Frontend build"),
+    }
+    db_session.add_all(chunks.values())
+    db_session.commit()
+    return chunks
+
+class KeywordEmbeddingService:
+    """
+    Stand-in for EmbeddingService: texts embed as normalized counts of a few
+    vocabulary words, and no document has stored vectors
+    """
+    vocabulary = ("auth", "log", "role", "script")
+    embedding_dim = len(vocabulary)
+    
+    def __init__(self):
+        self.embedded = []
+    
+    def embed_texts(self, texts):
+        self.embedded.append(list(texts))
+        vectors = np.array([[text.lower().count(word) for word in self.vocabulary] for text in texts],
+                           dtype=np.float32).reshape(len(texts), self.embedding_dim)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+    
+    def get_chunk_embeddings(self, document_id):
+        return None
+
+@pytest.fixture
+def embedding_service():
+    return KeywordEmbeddingService()
@@ -0,0 +1,110 @@
+# tests/test_api.py
+"""
+Tests for the HTTP API (routes exercised through FastAPI's TestClient)
+"""
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")  # Needed by TestClient
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from config import Config
+from database import get_db
+
+search = pytest.importorskip("routers.search")
+dependencies = pytest.importorskip("dependencies")
+
+@pytest.fixture
+def search_client(db_session, embedding_service):
+    app = FastAPI()
+    app.include_router(search.router, prefix="/api/search")
+    app.dependency_overrides[get_db] = lambda: db_session
+    app.dependency_overrides[dependencies.get_embedding_service] = lambda: embedding_service
+    with TestClient(app) as client:
+        yield client
+
+def test_semantic_batch_returns_one_response_per_query(search_client, chunks, embedding_service):
+    response = search_client.post("/api/search/semantic/batch", json={
+        "queries": ["script", "auth log"],
+        "top_k": 5
+    })
+    
+    assert response.status_code == 200
+    searches = response.json()["searches"]
+    assert [search["query"] for search in searches] == ["script", "auth log"]
+    assert [result["chunk_id"] for result in searches[0]["results"]] == [chunks["scripts"].id]
+    assert searches[1]["total_results"] == 2
+    assert embedding_service.embedded[0] == ["script", "auth log"]
+
+@pytest.mark.parametrize("queries", [[], ["query"] * 21])
+def test_semantic_batch_rejects_empty_or_oversized_batches(search_client, queries):
+    response = search_client.post("/api/search/semantic/batch", json={"queries": queries})
+    
+    assert response.status_code == 422
+
+@pytest.fixture
+def main(monkeypatch, database):
+    pytest.importorskip("uvicorn")
+    pytest.importorskip("multipart")  # python-multipart, needed by the upload route
+    main = pytest.importorskip("main")
+    monkeypatch.setattr(Config, "AZURE_OPENAI_ENDPOINT", "https://example.invalid/")
+    monkeypatch.setattr(Config, "AZURE_OPENAI_API_KEY", "test-key")
+    return main
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+def test_api_returns_503_until_deferred_init_finishes(main, monkeypatch):
+    released = threading.Event()
+    def slow_init(app):
+        released.wait(5)
+        app.state.ready = True
+    monkeypatch.setattr(main, "_deferred_init", slow_init)
+    
+    with TestClient(main.app) as client:
+        try:
+            assert client.get("/health/live").json() == {"status": "alive"}
+            assert client.get("/health/ready").status_code == 503
+            response = client.get("/api/documents/")
+            assert response.status_code == 503
+            assert response.headers["Retry-After"] == "1"
+        finally:
+            released.set()
+        
+        wait_until(lambda: main.app.state.ready)
+        assert client.get("/health/ready").json() == {"status": "ready"}
+
+def test_deferred_init_creates_the_database(main):
+    with TestClient(main.app) as client:
+        wait_until(lambda: main.app.state.ready)
+        assert client.get("/health/ready").status_code == 200
+        assert client.get("/api/documents/").status_code == 200
+
+def test_failed_deferred_init_stops_the_server(main, monkeypatch):
+    kills = []
+    def failing_init(app):
+        raise RuntimeError("database unavailable")
+    monkeypatch.setattr(main, "_deferred_init", failing_init)
+    monkeypatch.setattr(main.os, "kill", lambda pid, sig: kills.append((pid, sig)))
+    
+    with TestClient(main.app) as client:
+        wait_until(lambda: kills)
+        assert client.get("/health/ready").status_code == 503
+    
+    assert kills == [(os.getpid(), signal.SIGTERM)]
+
+def test_invalid_config_fails_startup(main, monkeypatch):
+    monkeypatch.setattr(Config, "AZURE_OPENAI_API_KEY", None)
+    
+    with pytest.raises(ValueError):
+        with TestClient(main.app):
+            pass
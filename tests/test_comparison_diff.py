@@ -0,0 +1,86 @@
+# tests/test_comparison_diff.py
+"""
+Tests for ComparisonService diff opcodes (Myers via diff-match-patch, and difflib)
+"""
+import pytest
+
+comparison_service = pytest.importorskip("services.comparison_service")
+ComparisonService = comparison_service.ComparisonService
+
+DIFF_CASES = [
+    ("", "abc"),
+    ("abc", ""),
+    ("same text", "same text"),
+    ("the quick brown fox", "the quick red fox jumps"),
+    ("alpha beta gamma delta", "beta gamma epsilon delta alpha"),
+    (("the", "quick", "brown", "fox"), ("a", "quick", "brown", "dog", "runs")),
+    (("one", "two", "three"), ("three", "two", "one")),
+]
+
+def apply_opcodes(seq_a, seq_b, opcodes):
+    """Rebuild seq_b from seq_a, checking that opcodes cover both sequences in order"""
+    rebuilt = []
+    i = j = 0
+    for tag, i1, i2, j1, j2 in opcodes:
+        assert (i1, j1) == (i, j)
+        if tag == 'equal':
+            assert list(seq_a[i1:i2]) == list(seq_b[j1:j2])
+            rebuilt.extend(seq_a[i1:i2])
+        elif tag in ('insert', 'replace'):
+            rebuilt.extend(seq_b[j1:j2])
+        else:
+            assert tag == 'delete' and j1 == j2
+        i, j = i2, j2
+    assert (i, j) == (len(seq_a), len(seq_b))
+    return rebuilt
+
+@pytest.mark.parametrize("seq_a,seq_b", DIFF_CASES)
+def test_myers_opcodes_reconstruct_target(seq_a, seq_b):
+    pytest.importorskip("diff_match_patch")
+    service = ComparisonService(None)
+    assert service.differ is not None
+    
+    opcodes = service._diff_opcodes(seq_a, seq_b)
+    assert apply_opcodes(seq_a, seq_b, opcodes) == list(seq_b)
+
+@pytest.mark.parametrize("seq_a,seq_b", DIFF_CASES)
+def test_difflib_opcodes_reconstruct_target(seq_a, seq_b):
+    service = ComparisonService(None)
+    service.differ = None
+    
+    opcodes = service._diff_opcodes(seq_a, seq_b)
+    assert apply_opcodes(seq_a, seq_b, opcodes) == list(seq_b)
+
+def test_myers_to_opcodes_merges_delete_insert_into_replace():
+    service = ComparisonService(None)
+    diffs = [(0, "ab"), (-1, "c"), (1, "de"), (0, "f"), (1, "g")]
+    
+    assert service._myers_to_opcodes(diffs) == [
+        ('equal', 0, 2, 0, 2),
+        ('replace', 2, 3, 2, 4),
+        ('equal', 3, 4, 4, 5),
+        ('insert', 4, 4, 5, 6),
+    ]
+
+def test_disjoint_content_reports_approximate_replacement_statistics():
+    service = ComparisonService(None)
+    config = comparison_service.ComparisonConfig(granularity="word")
+    content_a = "alpha beta gamma delta"
+    content_b = "one two three"
+    
+    result = service._diff_text_content(content_a, content_b, config, (1, 1), (2, 1))
+    
+    assert [op["type"] for op in result["operations"]] == ["replace"]
+    statistics = result["statistics"]
+    assert statistics["approximate"] is True
+    assert statistics["similarity_ratio"] < comparison_service.MIN_DIFF_SIMILARITY
+    assert (statistics["deletions"], statistics["additions"]) == (4, 3)  # Words replaced
+
+def test_similar_content_reports_exact_statistics():
+    service = ComparisonService(None)
+    config = comparison_service.ComparisonConfig(granularity="word")
+    
+    result = service._diff_text_content("alpha beta gamma", "alpha beta delta", config, (3, 1), (4, 1))
+    
+    assert "approximate" not in result["statistics"]
+    assert result["statistics"]["similarity_ratio"] == service._similarity_ratio("alpha beta gamma", "alpha beta delta")
@@ -0,0 +1,136 @@
+# tests/test_database.py
+"""
+Tests for the custom column types and the FTS5 full-text indexes
+"""
+import zlib
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import text
+
+from database import Document, Chunk, Comparison, JSONText, CHUNK_FTS_TABLE, TITLE_TRIGRAM_TABLE
+from utils.serialization import dumps_json, loads_json
+
+def add_document(session, slug="test-doc", **fields):
+    document = Document(slug=slug, title=fields.pop("title", "Test Document"), version=1, **fields)
+    session.add(document)
+    session.commit()
+    return document
+
+def add_comparison(session, **fields):
+    comparison = Comparison(doc_slug="test-doc", version_a=1, version_b=2, **fields)
+    session.add(comparison)
+    session.commit()
+    return comparison
+
+def set_raw_column(session, table_name, column_name, row_id, raw):
+    session.execute(text(f"UPDATE {table_name} SET {column_name} = :raw WHERE id = :id"),
+                    {"raw": raw, "id": row_id})
+    session.commit()
+    session.expire_all()
+
+def test_compressed_json_round_trip(db_session):
+    text_diff = {"operations": [{"type": "replace", "old_content": "a", "new_content": "b"}] * 50}
+    comparison = add_comparison(db_session, text_diff_json=text_diff, section_map_json=None)
+    
+    raw = db_session.execute(text("SELECT text_diff_json FROM comparisons WHERE id = :id"),
+                             {"id": comparison.id}).scalar()
+    assert isinstance(raw, bytes) and b"operations" not in raw  # Stored compressed
+    
+    db_session.expire_all()
+    loaded = db_session.get(Comparison, comparison.id)
+    assert loaded.text_diff_json == text_diff
+    assert loaded.section_map_json is None
+
+def test_compressed_json_reads_legacy_plain_json(db_session):
+    comparison = add_comparison(db_session)
+    set_raw_column(db_session, "comparisons", "text_diff_json", comparison.id, '{"operations": []}')
+    
+    assert db_session.get(Comparison, comparison.id).text_diff_json == {"operations": []}
+
+def test_compressed_json_reads_zlib_blobs(db_session):
+    comparison = add_comparison(db_session)
+    blob = zlib.compress(dumps_json({"sections": [1, 2]}))
+    set_raw_column(db_session, "comparisons", "section_map_json", comparison.id, blob)
+    
+    assert db_session.get(Comparison, comparison.id).section_map_json == {"sections": [1, 2]}
+
+def test_json_text_is_encoded_once(db_session):
+    metrics = {"overall_similarity": 0.5, "sections": ["a", "b"]}
+    comparison = add_comparison(db_session, metrics_json=metrics, llm_summary=None)
+    
+    raw = db_session.execute(text("SELECT metrics_json FROM comparisons WHERE id = :id"),
+                             {"id": comparison.id}).scalar()
+    assert loads_json(raw) == metrics  # A JSON object, not a JSON-encoded string
+    
+    db_session.expire_all()
+    loaded = db_session.get(Comparison, comparison.id)
+    assert loaded.metrics_json == metrics
+    assert loaded.llm_summary is None
+
+def test_json_text_passes_values_through_on_postgresql():
+    postgresql = SimpleNamespace(name="postgresql")
+    metrics = {"overall_similarity": 0.5}
+    
+    assert JSONText().process_bind_param(metrics, postgresql) is metrics
+    assert JSONText().process_result_value(metrics, postgresql) is metrics
+
+def test_tag_list_round_trip(db_session):
+    document = add_document(db_session, tags=["design", "risk"])
+    db_session.expire_all()
+    
+    assert db_session.get(Document, document.id).tags == ["design", "risk"]
+
+def test_tag_list_splits_comma_separated_input(db_session):
+    document = add_document(db_session, tags="design, risk,")
+    db_session.expire_all()
+    
+    assert db_session.get(Document, document.id).tags == ["design", "risk"]
+
+@pytest.mark.parametrize("stored,expected", [
+    ("design, risk", ["design", "risk"]),
+    ("[draft], review", ["[draft]", "review"]),
+    ("[wip]", ["[wip]"]),
+    ('["a", "b"]', ["a", "b"]),
+    ("", []),
+    (None, []),
+])
+def test_tag_list_reads_legacy_rows(db_session, stored, expected):
+    document = add_document(db_session)
+    set_raw_column(db_session, "documents", "tags", document.id, stored)
+    
+    assert db_session.get(Document, document.id).tags == expected
+
+def fts_row_ids(session, fts_table, match):
+    return {row[0] for row in session.execute(
+        text(f"SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH :match"),
+        {"match": match}
+    )}
+
+def test_chunk_fts_triggers_follow_inserts_updates_and_deletes(db_session):
+    document = add_document(db_session)
+    chunk = Chunk(document_id=document.id, chunk_ix=0, text="Authentication uses tokens",
+                  summary="Login flow")
+    db_session.add(chunk)
+    db_session.commit()
+    
+    assert fts_row_ids(db_session, CHUNK_FTS_TABLE, "authentication") == {chunk.id}
+    assert fts_row_ids(db_session, CHUNK_FTS_TABLE, "summary : login") == {chunk.id}
+    
+    chunk.text = "Authorization uses roles"
+    db_session.commit()
+    assert fts_row_ids(db_session, CHUNK_FTS_TABLE, "authentication") == set()
+    assert fts_row_ids(db_session, CHUNK_FTS_TABLE, "roles") == {chunk.id}
+    
+    db_session.delete(chunk)
+    db_session.commit()
+    assert fts_row_ids(db_session, CHUNK_FTS_TABLE, "roles") == set()
+
+def test_title_trigram_index_follows_title_changes(db_session):
+    document = add_document(db_session, title="Payment Gateway Design")
+    assert fts_row_ids(db_session, TITLE_TRIGRAM_TABLE, '"gateway"') == {document.id}
+    
+    document.title = "Billing Design"
+    db_session.commit()
+    assert fts_row_ids(db_session, TITLE_TRIGRAM_TABLE, '"gateway"') == set()
+    assert fts_row_ids(db_session, TITLE_TRIGRAM_TABLE, '"illing"') == {document.id}
@@ -0,0 +1,102 @@
+# tests/test_document_service.py
+"""
+Tests for DocumentService document creation and audit logging
+"""
+from pathlib import Path
+
+import pytest
+
+from database import AuditLog, Document, File
+from services.document_service import DocumentService
+from utils.text_processing import normalize_text
+
+def test_bulk_create_documents_writes_every_file(db_session):
+    service = DocumentService(db_session)
+    items = [
+        {"title": "API Guide", "content": "Version one of the API guide.", "filename": "api.txt"},
+        {"title": "User Guide", "content": "How to use the product.",
+         "metadata": {"author": "Docs Team", "tags": "guide, users"}},
+        {"title": "API Guide", "content": "Version two of the API guide."},
+    ]
+    
+    documents = service.bulk_create_documents(items)
+    
+    assert [(doc.title, doc.version) for doc in documents] == [
+        ("API Guide", 1), ("User Guide", 1), ("API Guide", 2)
+    ]
+    assert documents[1].author == "Docs Team" and documents[1].tags == ["guide", "users"]
+    
+    files = {file.document_id: file for file in db_session.query(File).all()}
+    assert set(files) == {doc.id for doc in documents}
+    assert files[documents[0].id].filename == "api.txt"
+    for document, item in zip(documents, items):
+        content = Path(files[document.id].path).read_bytes()
+        assert content.decode("utf-8") == normalize_text(item["content"])
+        assert files[document.id].size == document.bytes == len(content)
+
+def test_bulk_create_documents_returns_existing_identical_versions(db_session):
+    service = DocumentService(db_session)
+    existing = service.create_document("API Guide", "Version one of the API guide.")
+    
+    documents = service.bulk_create_documents([
+        {"title": "API Guide", "content": "Version one of the API guide."},
+        {"title": "Release Notes", "content": "First release."},
+    ])
+    
+    assert documents[0].id == existing.id
+    assert db_session.query(File).filter(File.document_id == existing.id).count() == 1
+    assert db_session.query(Document).count() == 2
+
+def test_bulk_create_documents_is_all_or_nothing(db_session):
+    service = DocumentService(db_session)
+    
+    with pytest.raises(ValueError):
+        service.bulk_create_documents([
+            {"title": "API Guide", "content": "Version one of the API guide."},
+            {"title": "Empty", "content": "   "},
+        ])
+    
+    assert db_session.query(Document).count() == 0
+
+def audit_operations(session):
+    return [(row.operation, row.entity_id) for row in session.query(AuditLog).order_by(AuditLog.id)]
+
+def test_audit_rows_are_queued_until_commit(db_session):
+    service = DocumentService(db_session)
+    document = service.create_document("API Guide", "Version one of the API guide.")
+    
+    service._log_operation("status_change", "document", document.id, {"new_status": "indexed"})
+    db_session.flush()
+    assert audit_operations(db_session) == [("upload", document.id)]
+    
+    service._commit()
+    assert audit_operations(db_session) == [("upload", document.id), ("status_change", document.id)]
+    assert service._pending_audits == []
+
+def test_rollback_discards_queued_audit_rows(db_session):
+    service = DocumentService(db_session)
+    document = service.create_document("API Guide", "Version one of the API guide.")
+    
+    service._log_operation("status_change", "document", document.id, {"new_status": "indexed"})
+    service._rollback()
+    service._commit()
+    
+    assert audit_operations(db_session) == [("upload", document.id)]
+
+def test_delete_all_versions_audits_each_version_in_one_commit(db_session):
+    service = DocumentService(db_session)
+    first = service.create_document("API Guide", "Version one of the API guide.")
+    second = service.create_document("API Guide", "Version two of the API guide.")
+    
+    assert service.delete_document(second.id, delete_all_versions=True)
+    
+    deletes = [entry for entry in audit_operations(db_session) if entry[0] == "delete"]
+    assert sorted(deletes) == sorted([("delete", first.id), ("delete", second.id)])
+    assert db_session.query(Document).count() == 0
+
+def test_unserializable_audit_details_fail_the_operation(db_session):
+    service = DocumentService(db_session)
+    
+    with pytest.raises(TypeError):
+        service._log_operation("upload", "document", 1, {"details": object()})
+    assert service._pending_audits == []
@@ -0,0 +1,97 @@
+# tests/test_embedding_service.py
+"""
+Tests for query embedding batching and caching in EmbeddingService
+"""
+import threading
+
+import numpy as np
+import pytest
+
+embedding_service = pytest.importorskip("services.embedding_service")
+BatchingEmbedder = embedding_service.BatchingEmbedder
+EmbeddingService = embedding_service.EmbeddingService
+
+class FakeModel:
+    """Encodes each text as [len(text), 1, 0, ...]; empty texts encode to zeros"""
+    dimension = 4
+    
+    def __init__(self):
+        self.encoded = []
+    
+    def get_sentence_embedding_dimension(self):
+        return self.dimension
+    
+    def encode(self, texts, **kwargs):
+        self.encoded.append(list(texts))
+        embeddings = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in zip(embeddings, texts):
+            if text:
+                row[:2] = (len(text), 1)
+        return embeddings
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(EmbeddingService, "_load_model", lambda self, model_name: FakeModel())
+    return EmbeddingService("fake-model")
+
+def test_batching_embedder_coalesces_concurrent_submits():
+    batches = []
+    def encode(texts):
+        batches.append(texts)
+        return np.array([[len(text)] for text in texts], dtype=np.float32)
+    
+    batcher = BatchingEmbedder(encode, batch_size=3, max_wait_ms=200)
+    futures = [batcher.submit(text) for text in ("a", "bb", "ccc", "dddd", "eeeee")]
+    
+    assert [future.result(timeout=5)[0] for future in futures] == [1, 2, 3, 4, 5]
+    assert [len(batch) for batch in batches] == [3, 2]
+
+def test_batching_embedder_fails_every_future_in_a_failed_batch():
+    def encode(texts):
+        raise RuntimeError("model unavailable")
+    
+    batcher = BatchingEmbedder(encode, max_wait_ms=50)
+    futures = [batcher.submit(text) for text in ("a", "b")]
+    
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result(timeout=5)
+
+def test_embed_query_shares_one_encode_across_threads(service):
+    # A generous batching window so all three threads land in one batch
+    service._query_batcher = BatchingEmbedder(service.embed_texts, max_wait_ms=500)
+    results = {}
+    def search(query):
+        results[query] = service.embed_query(query)
+    
+    threads = [threading.Thread(target=search, args=(query,)) for query in ("auth", "logging", "roles")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert [sorted(batch) for batch in service.model.encoded] == [["auth", "logging", "roles"]]
+    assert results["logging"].shape == (1, FakeModel.dimension)
+    assert results["logging"][0, 0] == len("logging")
+
+def test_embed_query_caches_by_query(service):
+    first = service.embed_query("user authentication")
+    first[0, 0] = -1  # Callers get a copy, never the cached array
+    second = service.embed_query("user authentication")
+    
+    assert second[0, 0] == len("user authentication")
+    assert service.model.encoded == [["user authentication"]]
+
+def test_embed_query_evicts_least_recently_used(service, monkeypatch):
+    monkeypatch.setattr(embedding_service, "QUERY_CACHE_SIZE", 2)
+    for query in ("alpha", "beta", "alpha", "gamma", "alpha", "beta"):
+        service.embed_query(query)
+    
+    # "beta" was evicted by "gamma"; "alpha" stayed as it was used more recently
+    assert [batch[0] for batch in service.model.encoded] == ["alpha", "beta", "gamma", "beta"]
+
+def test_embed_query_does_not_cache_failed_encodes(service):
+    service.embed_query("")
+    service.embed_query("")
+    
+    assert service.model.encoded == [[""], [""]]
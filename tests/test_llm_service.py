@@ -0,0 +1,86 @@
+# tests/test_llm_service.py
+"""
+Tests for the LLMService on-disk analysis cache
+"""
+import asyncio
+import os
+import time
+
+import pytest
+
+from config import Config
+
+llm_service = pytest.importorskip("services.llm_service")
+LLMService = llm_service.LLMService
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "UPLOAD_FOLDER", str(tmp_path))
+    return LLMService(endpoint="https://example.invalid/", api_key="test-key",
+                      api_version="2024-12-01-preview", deployment="test-deployment")
+
+def cache_files(service):
+    return sorted(path.name for path in service._cache_dir.iterdir())
+
+def age_entry(service, cache_key, seconds):
+    path = service._cache_dir / f"{cache_key}.json"
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+def test_cache_round_trip_marks_hits(service):
+    key = service._cache_key("chunk", "Some chunk text")
+    assert service._read_cache(key) is None
+    
+    service._write_cache(key, {"intent_label": "design", "summary": "A design note"})
+    
+    assert service._read_cache(key) == {"intent_label": "design", "summary": "A design note", "cache_hit": True}
+    assert cache_files(service) == [f"{key}.json"]  # No temp files left behind
+
+def test_cache_keys_depend_on_deployment_kind_and_text(service):
+    key = service._cache_key("chunk", "text")
+    
+    assert key != service._cache_key("chunk", "other text")
+    assert key != service._cache_key("synthesis", "text")
+    service.deployment = "other-deployment"
+    assert key != service._cache_key("chunk", "text")
+
+def test_expired_entries_are_dropped_on_read(service):
+    key = service._cache_key("chunk", "Some chunk text")
+    service._write_cache(key, {"summary": "stale"})
+    age_entry(service, key, llm_service.LLM_CACHE_TTL_SECONDS + 60)
+    
+    assert service._read_cache(key) is None
+    assert cache_files(service) == []
+
+def test_prune_drops_expired_then_oldest_entries(service, monkeypatch):
+    monkeypatch.setattr(llm_service, "LLM_CACHE_MAX_ENTRIES", 2)
+    keys = [service._cache_key("chunk", f"text {i}") for i in range(4)]
+    for age, key in zip((llm_service.LLM_CACHE_TTL_SECONDS + 60, 300, 200, 100), keys):
+        service._write_cache(key, {"summary": key})
+        age_entry(service, key, age)
+    
+    service._prune_cache()
+    
+    assert cache_files(service) == sorted(f"{key}.json" for key in keys[2:])
+
+def test_prune_runs_on_first_write_then_every_interval(service, monkeypatch):
+    monkeypatch.setattr(llm_service, "LLM_CACHE_PRUNE_INTERVAL", 3)
+    prunes = []
+    monkeypatch.setattr(service, "_prune_cache", lambda: prunes.append(len(cache_files(service))))
+    
+    for i in range(7):
+        service._write_cache(service._cache_key("chunk", f"text {i}"), {"summary": i})
+    
+    assert prunes == [1, 4, 7]
+
+def test_analyze_chunk_serves_cache_hits_without_a_request(service, monkeypatch):
+    text = "The system must support user authentication."
+    service._write_cache(service._cache_key("chunk", text), {"intent_label": "requirements", "chunk_index": 0})
+    
+    async def no_request(**kwargs):
+        raise AssertionError("cache hit must not call the API")
+    monkeypatch.setattr(service, "_create_completion", no_request)
+    
+    result = asyncio.run(service.analyze_chunk(text, 3, "System Requirements"))
+    
+    assert result == {"intent_label": "requirements", "chunk_index": 3, "cache_hit": True}
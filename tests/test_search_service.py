@@ -0,0 +1,80 @@
+# tests/test_search_service.py
+"""
+Tests for SearchService keyword, full-text and batch semantic search
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import text
+
+from database import CHUNK_FTS_TABLE
+
+search_service = pytest.importorskip("services.search_service")
+SearchService = search_service.SearchService
+
+def fts_chunk_ids(session, match):
+    return {row[0] for row in session.execute(
+        text(f"SELECT rowid FROM {CHUNK_FTS_TABLE} WHERE {CHUNK_FTS_TABLE} MATCH :match"),
+        {"match": match}
+    )}
+
+def test_fts_match_expressions_match_word_prefixes(db_session, chunks):
+    fts_match = SearchService._fts_match
+    logs, failures = chunks["logs"].id, chunks["failures"].id
+    
+    # Any word, each as a prefix
+    assert fts_chunk_ids(db_session, fts_match("auth")) == {logs, failures}
+    assert fts_chunk_ids(db_session, fts_match("retain security")) == {logs, failures}
+    # Phrase: all words in sequence, the last one as a prefix
+    assert fts_chunk_ids(db_session, fts_match("authentication log", phrase=True)) == {logs}
+    # Column restriction
+    assert fts_chunk_ids(db_session, fts_match("retention", column_name="summary")) == {logs}
+    assert fts_chunk_ids(db_session, fts_match("retention", column_name="text")) == set()
+    # Punctuation-only queries have no searchable terms
+    assert fts_match("?!") is None
+
+def test_keyword_search_matches_substrings_inside_words(db_session, chunks):
+    service = SearchService(db_session)
+    
+    results = service._perform_keyword_search("script", top_k=5)
+    assert [result["chunk_id"] for result in results] == [chunks["scripts"].id]
+
+def test_keyword_search_scores_every_matching_chunk(db_session, chunks):
+    service = SearchService(db_session)
+    
+    # "logs" is a whole word in two chunks; the exact-phrase boost must still
+    # put the chunk containing the full query first
+    results = service._perform_keyword_search("authentication logs are", top_k=1)
+    assert [result["chunk_id"] for result in results] == [chunks["logs"].id]
+
+def test_content_and_summary_search_match_mid_word(db_session, chunks):
+    service = SearchService(db_session)
+    
+    content = service._search_content("uthentication lo", {}, top_k=5)
+    assert [result["chunk_id"] for result in content] == [chunks["logs"].id]
+    
+    summaries = service._search_summaries("ecurity ev", {}, top_k=5)
+    assert [result["chunk_id"] for result in summaries] == [chunks["failures"].id]
+
+def test_semantic_search_batch_embeds_all_queries_at_once(db_session, chunks, embedding_service):
+    service = SearchService(db_session, embedding_service)
+    queries = ["auth log", "script", "roles"]
+    
+    batch = asyncio.run(service.semantic_search_batch(queries, top_k=5, similarity_threshold=0.5))
+    
+    assert embedding_service.embedded[0] == queries
+    assert [search["query"] for search in batch["searches"]] == queries
+    assert {result["chunk_id"] for result in batch["searches"][0]["results"]} == {
+        chunks["logs"].id, chunks["failures"].id
+    }
+    assert [result["chunk_id"] for result in batch["searches"][1]["results"]] == [chunks["scripts"].id]
+    assert batch["searches"][2]["total_results"] == 0
+
+def test_semantic_search_batch_applies_top_k_and_filters(db_session, chunks, embedding_service):
+    service = SearchService(db_session, embedding_service)
+    
+    batch = asyncio.run(service.semantic_search_batch(["auth log"], top_k=1))
+    assert batch["searches"][0]["total_results"] == 1
+    
+    batch = asyncio.run(service.semantic_search_batch(["auth log"], document_slug="other-doc"))
+    assert batch["searches"][0]["results"] == []
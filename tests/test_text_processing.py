@@ -0,0 +1,37 @@
+# tests/test_text_processing.py
+"""
+Tests for content checksums (BLAKE3 "b3:" values and legacy SHA-256)
+"""
+import pytest
+
+from utils.text_processing import (
+    BLAKE3_PREFIX, calculate_text_hash, short_checksum, text_matches_checksum
+)
+
+TEXT = "System requirements\n\nThe service must respond within 500 ms."
+
+def test_blake3_checksum_matches():
+    pytest.importorskip("blake3")
+    checksum = calculate_text_hash(TEXT, 'blake3')
+    
+    assert checksum.startswith(BLAKE3_PREFIX)
+    assert len(checksum) <= 64  # Fits Document.checksum
+    assert text_matches_checksum(TEXT, checksum)
+    assert not text_matches_checksum(TEXT + " Changed.", checksum)
+
+def test_legacy_sha256_checksum_matches():
+    checksum = calculate_text_hash(TEXT, 'sha256')
+    
+    assert not checksum.startswith(BLAKE3_PREFIX)
+    assert text_matches_checksum(TEXT, checksum)
+    assert text_matches_checksum(TEXT, checksum, content_hash=calculate_text_hash(TEXT))
+    assert not text_matches_checksum(TEXT + " Changed.", checksum)
+
+def test_missing_checksum_never_matches():
+    assert not text_matches_checksum(TEXT, None)
+    assert not text_matches_checksum(TEXT, "")
+
+def test_short_checksum_strips_algorithm_prefix():
+    assert short_checksum(BLAKE3_PREFIX + "0123456789abcdef") == "01234567..."
+    assert short_checksum("fedcba9876543210") == "fedcba98..."
+    assert short_checksum(None) == ""
@@ -0,0 +1,112 @@
+# utils/serialization.py
+"""
+DocuReview Pro - Serialization Utilities
+Compact JSON encoding and compression for cached payloads
+"""
+import json
+import zlib
+from typing import Any, Union
+
+try:
+    import zstandard as zstd
+except ImportError:  # zstandard is optional; fall back to zlib
+    zstd = None
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib json module
+    orjson = None
+
+# zstd frames start with this magic number; anything else is zlib
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+COMPRESSION_LEVEL = 3
+
+_compressor = zstd.ZstdCompressor(level=COMPRESSION_LEVEL) if zstd else None
+_decompressor = zstd.ZstdDecompressor() if zstd else None
+
+ORJSON_OPTIONS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+def dumps_json(data: Any) -> bytes:
+    """
+    Serialize data to UTF-8 encoded JSON
+
+    Args:
+        data (Any): JSON-serializable data (numpy values allowed with orjson)
+
+    Returns:
+        bytes: Encoded JSON (orjson when available, stdlib json otherwise)
+
+    Example:
+        raw = dumps_json({"similarity": 0.92})
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=ORJSON_OPTIONS)
+    return json.dumps(data).encode('utf-8')
+
+def loads_json(raw: Union[bytes, str]) -> Any:
+    """
+    Parse JSON from bytes or str
+
+    Args:
+        raw (Union[bytes, str]): Encoded JSON
+
+    Returns:
+        Any: Parsed JSON data
+
+    Example:
+        data = loads_json(b'{"similarity": 0.92}')
+    """
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+def compress_json(data: Any) -> bytes:
+    """
+    Serialize data to JSON and compress it for storage
+
+    Args:
+        data (Any): JSON-serializable data
+
+    Returns:
+        bytes: Compressed JSON (zstd when available, zlib otherwise)
+
+    Example:
+        blob = compress_json({"operations": [...]})
+    """
+    raw = dumps_json(data)
+    if _compressor is not None:
+        return _compressor.compress(raw)
+    return zlib.compress(raw, COMPRESSION_LEVEL)
+
+def decompress_json(value: Union[bytes, memoryview, str, None], default: Any = None) -> Any:
+    """
+    Decompress and parse a value written by compress_json
+
+    Plain JSON strings from rows written before compression was
+    introduced are parsed as-is.
+
+    Args:
+        value (Union[bytes, memoryview, str, None]): Stored value
+        default (Any): Value returned when nothing is stored
+
+    Returns:
+        Any: Parsed JSON data
+
+    Example:
+        text_diff = decompress_json(comparison.text_diff_json, {})
+    """
+    if not value:
+        return default
+
+    if isinstance(value, str):
+        return loads_json(value)
+
+    raw = bytes(value)
+    if raw.startswith(ZSTD_MAGIC):
+        if _decompressor is None:
+            raise RuntimeError("zstandard is required to read this cached payload")
+        raw = _decompressor.decompress(raw)
+    else:
+        raw = zlib.decompress(raw)
+
+    return loads_json(raw)
@@ -4,11 +4,33 @@ DocuReview Pro - Text Processing Utilities
 Text normalization, cleaning, and preprocessing functions
 """
 import re
+import mmap
 import hashlib
 import unicodedata
 from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 
+try:
+    import blake3
+except ImportError:  # blake3 is optional; fall back to hashlib SHA-256
+    blake3 = None
+
+# BLAKE3 checksums carry a prefix so legacy SHA-256 checksums stay recognizable.
+# The digest is truncated to 30 bytes to fit the 64-character checksum column.
+BLAKE3_PREFIX = "b3:"
+BLAKE3_DIGEST_BYTES = 30
+DEFAULT_HASH_ALGORITHM = 'blake3' if blake3 is not None else 'sha256'
+
+# Precompiled patterns for per-line and whole-document scans
+TRAILING_WHITESPACE_PATTERN = re.compile(r'[^\S\n]+$', re.MULTILINE)
+NUMBERED_HEADING_PATTERN = re.compile(r'^\d+\.?\s+[A-Z]')
+LABELED_HEADING_PATTERN = re.compile(r'^(Chapter|Section|Part|Appendix)\s+', re.IGNORECASE)
+LIST_ITEM_PATTERN = re.compile(r'^\s*[-*]\s+', re.MULTILINE)
+NUMBERED_ITEM_PATTERN = re.compile(r'^\s*\d+\.\s+', re.MULTILINE)
+CODE_BLOCK_PATTERN = re.compile(r'```|`[^`]+`')
+TECHNICAL_TERM_PATTERN = re.compile(r'\b[A-Z]{2,}[A-Z0-9]*\b')
+SLUG_SEPARATOR_PATTERN = re.compile(r'[^a-z0-9]+')
+
 def normalize_text(text: str, aggressive: bool = False) -> str:
     """
     Normalize text for consistent processing
@@ -54,7 +76,7 @@ def normalize_text(text: str, aggressive: bool = False) -> str:
         # Collapse multiple line breaks to double breaks
         text = re.sub(r'\n\s*\n\s*\n+', '\n\n', text)
         # Remove trailing whitespace from lines
-        text = '\n'.join(line.rstrip() for line in text.split('\n'))
+        text = TRAILING_WHITESPACE_PATTERN.sub('', text)
     
     return text
 
@@ -106,7 +128,12 @@ def extract_headings(text: str) -> List[Dict[str, any]]:
     headings = []
     lines = text.split('\n')
     
+    # Character offset of each line start, advanced as we go
+    next_char_position = 0
+    
     for i, line in enumerate(lines):
+        char_position = next_char_position
+        next_char_position += len(line) + 1
         line = line.strip()
         
         if not line:
@@ -134,47 +161,134 @@ def extract_headings(text: str) -> List[Dict[str, any]]:
                 heading_info = {"text": line, "level": level, "pattern": "underlined"}
         
         # Pattern 4: Numbered sections
-        elif re.match(r'^\d+\.?\s+[A-Z]', line):
+        elif NUMBERED_HEADING_PATTERN.match(line):
             heading_info = {"text": line, "level": 2, "pattern": "numbered"}
         
         # Pattern 5: Lines with specific prefixes
-        elif re.match(r'^(Chapter|Section|Part|Appendix)\s+', line, re.IGNORECASE):
+        elif LABELED_HEADING_PATTERN.match(line):
             heading_info = {"text": line, "level": 1, "pattern": "labeled"}
         
         if heading_info:
             heading_info["position"] = i
-            heading_info["char_position"] = sum(len(lines[j]) + 1 for j in range(i))
+            heading_info["char_position"] = char_position
             headings.append(heading_info)
     
     return headings
 
-def calculate_text_hash(text: str, algorithm: str = 'sha256') -> str:
+def calculate_text_hash(text: str, algorithm: str = DEFAULT_HASH_ALGORITHM) -> str:
     """
     Calculate hash of text for change detection
     
     Args:
         text (str): Input text
-        algorithm (str): Hash algorithm (sha256, md5, etc.)
+        algorithm (str): Hash algorithm (blake3, sha256, md5, etc.)
     
     Returns:
-        str: Hex digest of text hash
+        str: Hex digest of text hash ("b3:"-prefixed for BLAKE3)
     
     Example:
         hash_val = calculate_text_hash("Some text content")
-        # Returns: "a1b2c3d4e5f6..."
+        # Returns: "b3:a1b2c3d4e5f6..."
     """
     if not text:
         return ""
     
     # Normalize text for consistent hashing
-    normalized = normalize_text(text, aggressive=True)
+    normalized = normalize_text(text, aggressive=True).encode('utf-8')
     
     # Calculate hash
+    if algorithm == 'blake3':
+        digest = blake3.blake3(normalized, max_threads=blake3.blake3.AUTO)
+        return BLAKE3_PREFIX + digest.hexdigest(length=BLAKE3_DIGEST_BYTES)
+    
     hasher = hashlib.new(algorithm)
-    hasher.update(normalized.encode('utf-8'))
+    hasher.update(normalized)
     
     return hasher.hexdigest()
 
+def text_matches_checksum(text: str, checksum: Optional[str],
+                          content_hash: Optional[str] = None) -> bool:
+    """
+    Check whether text matches a stored checksum of either hash scheme
+    
+    Args:
+        text (str): Input text
+        checksum (Optional[str]): Stored checksum (BLAKE3 or legacy SHA-256)
+        content_hash (Optional[str]): Precomputed calculate_text_hash(text)
+    
+    Returns:
+        bool: True if the text hashes to the stored checksum
+    
+    Example:
+        if text_matches_checksum(content, latest.checksum, content_hash):
+            return latest
+    """
+    if not checksum:
+        return False
+    
+    if content_hash is None:
+        content_hash = calculate_text_hash(text)
+    if checksum == content_hash:
+        return True
+    
+    # Legacy SHA-256 checksum written before BLAKE3 was available
+    if not checksum.startswith(BLAKE3_PREFIX) and content_hash.startswith(BLAKE3_PREFIX):
+        return checksum == calculate_text_hash(text, 'sha256')
+    
+    return False
+
+def short_checksum(checksum: Optional[str], length: int = 8) -> str:
+    """
+    Abbreviate a checksum for display, without its algorithm prefix
+    
+    Args:
+        checksum (Optional[str]): Stored checksum (BLAKE3 or legacy SHA-256)
+        length (int): Number of hex digits to keep
+    
+    Returns:
+        str: Leading hex digits followed by "...", or "" if there is no checksum
+    
+    Example:
+        short_checksum("b3:a1b2c3d4e5f6...")
+        # Returns: "a1b2c3d4..."
+    """
+    if not checksum:
+        return ""
+    if checksum.startswith(BLAKE3_PREFIX):
+        checksum = checksum[len(BLAKE3_PREFIX):]
+    return checksum[:length] + "..."
+
+def read_text_file(path) -> str:
+    """
+    Read a UTF-8 text file with a single decode pass
+    
+    The file is memory-mapped and decoded straight from the mapping, so no
+    intermediate bytes copy is made. Line endings are normalized to '\n'
+    as in text-mode reads.
+    
+    Args:
+        path: File path (str or Path)
+    
+    Returns:
+        str: File content
+    
+    Example:
+        content = read_text_file("uploads/doc_123.txt")
+    """
+    with open(path, 'rb') as f:
+        # Empty files cannot be memory-mapped
+        if f.seek(0, 2) == 0:
+            return ""
+        
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as view:
+                text = str(view, 'utf-8')
+    
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    
+    return text
+
 def split_into_sentences(text: str) -> List[str]:
     """
     Split text into sentences using regex patterns
@@ -271,19 +385,19 @@ def detect_document_structure(text: str) -> Dict[str, any]:
     # Basic statistics
     lines = text.split('\n')
     paragraphs = [p.strip() for p in text.split('\n\n') if p.strip()]
-    words = len(re.findall(r'\S+', text))
+    words = len(text.split())
     chars = len(text)
     
     # Extract headings
     headings = extract_headings(text)
     
     # Detect lists
-    list_items = len(re.findall(r'^\s*[-*]\s+', text, re.MULTILINE))
-    numbered_items = len(re.findall(r'^\s*\d+\.\s+', text, re.MULTILINE))
+    list_items = sum(1 for _ in LIST_ITEM_PATTERN.finditer(text))
+    numbered_items = sum(1 for _ in NUMBERED_ITEM_PATTERN.finditer(text))
     
     # Detect code blocks or technical content
-    code_blocks = len(re.findall(r'```|`[^`]+`', text))
-    technical_terms = len(re.findall(r'\b[A-Z]{2,}[A-Z0-9]*\b', text))
+    code_blocks = sum(1 for _ in CODE_BLOCK_PATTERN.finditer(text))
+    technical_terms = sum(1 for _ in TECHNICAL_TERM_PATTERN.finditer(text))
     
     return {
         "word_count": words,
@@ -317,20 +431,9 @@ def generate_document_slug(title: str) -> str:
     if not title:
         return "untitled"
     
-    # Convert to lowercase
-    slug = title.lower()
-    
-    # Replace non-alphanumeric characters with hyphens
-    slug = re.sub(r'[^a-z0-9]+', '-', slug)
-    
-    # Remove leading/trailing hyphens
-    slug = slug.strip('-')
-    
-    # Collapse multiple hyphens
-    slug = re.sub(r'-+', '-', slug)
-    
-    # Limit length
-    slug = slug[:100]
+    # Replace runs of non-alphanumeric characters with a single hyphen and
+    # remove leading/trailing hyphens, then limit length
+    slug = SLUG_SEPARATOR_PATTERN.sub('-', title.lower()).strip('-')[:100]
     
     # Ensure not empty
     if not slug:
@@ -403,6 +506,6 @@ This document outlines all requirements.
     # Test hashing
     print("\n🔒 Testing text hashing...")
     hash_val = calculate_text_hash(test_text)
-    print(f"✅ SHA256 hash: {hash_val[:16]}...")
+    print(f"✅ {DEFAULT_HASH_ALGORITHM} hash: {hash_val[:16]}...")
     
     print("\n✅ Text processing utilities test completed!")
\ No newline at end of file